@@ -42,6 +42,7 @@ TURNSTILE_TIMEOUT = int(os.getenv('TURNSTILE_TIMEOUT', '60'))  # seconds
 BOTSFORGE_SERVICE_HOST = os.getenv('BOTSFORGE_SERVICE_HOST', '127.0.0.1')
 BOTSFORGE_SERVICE_PORT = int(os.getenv('BOTSFORGE_SERVICE_PORT', '5033'))
 ENABLE_BOTSFORGE_SERVICE = bool(int(os.getenv('ENABLE_BOTSFORGE_SERVICE', '1')))  # Enable BotsForge API service
+PARALLEL_SOLVERS = bool(int(os.getenv('PARALLEL_SOLVERS', '0')))  # Race all available solvers (higher upstream API usage)
 
 # BotsForge API key - use centralized API key manager
 try:
@@ -72,6 +73,11 @@ ENABLE_RESOURCE_MONITORING = bool(int(os.getenv('ENABLE_RESOURCE_MONITORING', '1
 FORCE_NO_PROXY = bool(int(os.getenv('FORCE_NO_PROXY', '0')))  # Test without proxies
 DEBUG_ENHANCED_FEATURES = bool(int(os.getenv('DEBUG_ENHANCED_FEATURES', '0')))  # Debug enhanced features
 
+# VNC settings
+VNC_INPROCESS_PROXY = bool(int(os.getenv('VNC_INPROCESS_PROXY', '0')))  # Serve noVNC from the bot process instead of a websockify per session
+VNC_WARM_POOL_SIZE = int(os.getenv('VNC_WARM_POOL_SIZE', '0'))  # Idle Xvfb+fluxbox displays kept booted for new VNC sessions
+USE_UVLOOP = bool(int(os.getenv('USE_UVLOOP', '0')))  # Run the bot on uvloop when installed (libuv owns SIGCHLD then; VNC health falls back to polling)
+
 
 # Dropbox integration
 DROPBOX_APP_KEY = os.getenv('DROPBOX_APP_KEY')
@@ -10,6 +10,12 @@ from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQu
 from telegram import Update, BotCommand
 from telegram.ext import ContextTypes
 
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
 # Import handlers
 from handlers.start_handler import start_command, help_command, status_command
 from handlers.file_handler import FileHandler
@@ -20,7 +26,8 @@ from config.settings import (
     BOT_TOKEN, TEMP_DIR, DATA_DIR,
     ENABLE_TURNSTILE_SERVICE, TURNSTILE_SERVICE_HOST, TURNSTILE_SERVICE_PORT,
     TURNSTILE_SERVICE_THREADS, USE_ENHANCED_BROWSER, PREFERRED_BROWSER_TYPE,
-    ENABLE_BOTSFORGE_SERVICE, BOTSFORGE_SERVICE_HOST, BOTSFORGE_SERVICE_PORT
+    ENABLE_BOTSFORGE_SERVICE, BOTSFORGE_SERVICE_HOST, BOTSFORGE_SERVICE_PORT,
+    USE_UVLOOP
 )
 
 # API key management is now handled by individual solvers
@@ -70,6 +77,11 @@ async def refresh_dropbox_token(context):
     except Exception as e:
         logger.error(f"❌ Error during scheduled Dropbox token refresh: {e}")
 
+async def shutdown_dropbox(application):
+    """Close the shared Dropbox connection pool on shutdown"""
+    from utils.dropbox_uploader import DropboxUploader
+    await DropboxUploader.close_session()
+
 async def initialize_all_systems():
     """Initialize all systems including solvers and resource monitoring"""
     logger.info("🚀 Initializing Mass-checker systems...")
@@ -135,8 +147,16 @@ def main():
     os.makedirs(TEMP_DIR, exist_ok=True)
     os.makedirs(DATA_DIR, exist_ok=True)
     
+    # Must be set before the application creates its event loop
+    if USE_UVLOOP:
+        if UVLOOP_AVAILABLE:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            logger.info("⚡ Using uvloop event loop")
+        else:
+            logger.warning("⚠️ USE_UVLOOP set but uvloop is not installed, using default event loop")
+    
     # Create application
-    application = Application.builder().token(BOT_TOKEN).build()
+    application = Application.builder().token(BOT_TOKEN).post_shutdown(shutdown_dropbox).build()
     
     # Initialize all systems at startup
     application.job_queue.run_once(
@@ -15,7 +15,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
-    from utils.vnc_manager import vnc_manager
+    from utils.vnc_manager import get_vnc_manager
     from utils.vnc_browser_manager import VNCBrowserManager
     VNC_AVAILABLE = True
 except ImportError:
@@ -47,11 +47,20 @@ class CaptchaSolverVNC:
         try:
             session_id = f"solver_{solver_id}_{task_type}"
             
-            # Create browser session with VNC
-            browser_session = await self.vnc_browser_manager.create_browser_session(
-                user_id=solver_id,
-                session_id=session_id
-            )
+            browser_session = None
+            if session_id in self.active_sessions:
+                # Same solver and task again - clean context on its warm browser, no relaunch
+                browser_session = await self.vnc_browser_manager.recycle_browser_session(session_id)
+                if not browser_session:
+                    del self.active_sessions[session_id]
+                    await self.vnc_browser_manager.destroy_browser_session(session_id)
+            
+            if not browser_session:
+                # Create browser session with VNC
+                browser_session = await self.vnc_browser_manager.create_browser_session(
+                    user_id=solver_id,
+                    session_id=session_id
+                )
             
             if browser_session:
                 # Get VNC access URLs
@@ -304,7 +313,7 @@ class CaptchaSolverVNC:
             # Destroy VNC session
             vnc_session = session.get('vnc_session')
             if vnc_session:
-                vnc_manager.destroy_session(vnc_session.session_id)
+                get_vnc_manager().destroy_session(vnc_session.session_id)
             
             # Remove from active sessions
             del self.active_sessions[session_id]
@@ -85,6 +85,7 @@ class AccountChecker:
                 
                 # Create new page (will inherit user agent from context)
                 page = await context.new_page()
+                login_handler = None
                 
                 try:
                     # Start screenshot monitoring every 5 seconds
@@ -158,6 +159,9 @@ class AccountChecker:
                     except:
                         pass
                     
+                    if login_handler is not None:
+                        await login_handler.aclose()
+                    
                     # Increment checks counter for cleanup
                     self.browser_manager.checks_performed += 1
                     await self.browser_manager.cleanup_old_contexts()
@@ -347,8 +347,8 @@ class BrowserManager:
         logger.info("🔧 Creating visible browser for challenge solving...")
         
         # Set up virtual display for headless environments
-        from utils.virtual_display import ensure_virtual_display
-        if not ensure_virtual_display():
+        from utils.virtual_display import aensure_virtual_display
+        if not await aensure_virtual_display():
             logger.warning("⚠️ Failed to start virtual display, falling back to headless mode")
         else:
             logger.info("✅ Virtual display ready for visible browser")
@@ -4,6 +4,7 @@ import base64
 import json
 import logging
 import time
+from datetime import datetime
 from typing import Optional
 from config import settings
 
@@ -102,6 +103,58 @@ class DropboxTokenManager:
             return None
 
 class DropboxUploader:
+    # One keep-alive connection pool shared by every upload, so TCP+TLS handshakes
+    # happen once per host instead of once per request
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    CONTENT_HOST_URL = "https://content.dropboxapi.com/"
+
+    @classmethod
+    def get_session(cls) -> aiohttp.ClientSession:
+        """Shared aiohttp session for Dropbox API calls (recreated for a new event loop)"""
+        loop = asyncio.get_running_loop()
+        if cls._session is None or cls._session.closed or cls._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, force_close=False)
+            cls._session = aiohttp.ClientSession(connector=connector)
+            cls._session_loop = loop
+        return cls._session
+
+    @classmethod
+    async def close_session(cls):
+        """Close the shared session (call on shutdown)"""
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+        cls._session = None
+        cls._session_loop = None
+
+    @classmethod
+    async def warmup(cls) -> bool:
+        """Open pooled connections to the Dropbox API and content hosts before the first upload"""
+        if not settings.DROPBOX_ENABLED:
+            return False
+        
+        token = await DropboxTokenManager.get_access_token()
+        if not token:
+            return False
+        
+        session = cls.get_session()
+        timeout = aiohttp.ClientTimeout(total=15)
+        try:
+            # Cheap authenticated no-op on the API host, plain HEAD on the upload host;
+            # only the pooled connection matters, not the response
+            async with session.post("https://api.dropboxapi.com/2/check/user", json={"query": "warmup"}, headers={
+                "Authorization": f"Bearer {token}"
+            }, timeout=timeout) as resp:
+                await resp.read()
+            async with session.head(cls.CONTENT_HOST_URL, timeout=timeout) as resp:
+                await resp.read()
+            logger.info("Dropbox connections warmed up")
+            return True
+        except Exception as e:
+            logger.warning(f"Dropbox connection warmup failed: {e}")
+            return False
+
     @staticmethod
     async def ensure_folder(access_token: str, path: str) -> bool:
         """Create folder in Dropbox if it doesn't exist"""
@@ -118,23 +171,23 @@ class DropboxUploader:
         timeout = aiohttp.ClientTimeout(total=30)
         
         try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                payload = {"path": path, "autorename": False}
-                async with session.post(api_url, json=payload, headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Content-Type": "application/json"
-                }) as resp:
-                    if resp.status == 200:
-                        logger.info(f"Dropbox folder created: {path}")
-                        return True
-                    elif resp.status == 409:
-                        # 409 conflict means folder already exists
-                        logger.debug(f"Dropbox folder already exists: {path}")
-                        return True
-                    else:
-                        text = await resp.text()
-                        logger.warning(f"Dropbox folder creation failed for {path}: {resp.status} - {text[:300]}")
-                        return False
+            session = DropboxUploader.get_session()
+            payload = {"path": path, "autorename": False}
+            async with session.post(api_url, json=payload, headers={
+                "Authorization": f"Bearer {access_token}",
+                "Content-Type": "application/json"
+            }, timeout=timeout) as resp:
+                if resp.status == 200:
+                    logger.info(f"Dropbox folder created: {path}")
+                    return True
+                elif resp.status == 409:
+                    # 409 conflict means folder already exists
+                    logger.debug(f"Dropbox folder already exists: {path}")
+                    return True
+                else:
+                    text = await resp.text()
+                    logger.warning(f"Dropbox folder creation failed for {path}: {resp.status} - {text[:300]}")
+                    return False
         except Exception as e:
             logger.error(f"Error creating Dropbox folder {path}: {e}")
             return False
@@ -163,15 +216,15 @@ class DropboxUploader:
                     try:
                         list_url = "https://api.dropboxapi.com/2/files/list_folder"
                         timeout = aiohttp.ClientTimeout(total=30)
-                        async with aiohttp.ClientSession(timeout=timeout) as session:
-                            payload = {"path": current_path}
-                            async with session.post(list_url, json=payload, headers={
-                                "Authorization": f"Bearer {access_token}",
-                                "Content-Type": "application/json"
-                            }) as resp:
-                                if resp.status != 200:
-                                    logger.error(f"Failed to create or verify folder: {current_path}")
-                                    return False
+                        session = DropboxUploader.get_session()
+                        payload = {"path": current_path}
+                        async with session.post(list_url, json=payload, headers={
+                            "Authorization": f"Bearer {access_token}",
+                            "Content-Type": "application/json"
+                        }, timeout=timeout) as resp:
+                            if resp.status != 200:
+                                logger.error(f"Failed to create or verify folder: {current_path}")
+                                return False
                     except Exception as e:
                         logger.error(f"Error verifying folder {current_path}: {e}")
                         return False
@@ -218,19 +271,19 @@ class DropboxUploader:
         }
 
         try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(content_url, data=data, headers={
-                    "Authorization": f"Bearer {token}",
-                    "Dropbox-API-Arg": json.dumps(args),
-                    "Content-Type": "application/octet-stream"
-                }) as resp:
-                    if resp.status == 200:
-                        logger.info(f"File uploaded to Dropbox: {dropbox_path}")
-                        return True
-                    else:
-                        text = await resp.text()
-                        logger.error(f"Dropbox upload failed for {dropbox_path}: {resp.status} - {text[:300]}")
-                        return False
+            session = DropboxUploader.get_session()
+            async with session.post(content_url, data=data, headers={
+                "Authorization": f"Bearer {token}",
+                "Dropbox-API-Arg": json.dumps(args),
+                "Content-Type": "application/octet-stream"
+            }, timeout=timeout) as resp:
+                if resp.status == 200:
+                    logger.info(f"File uploaded to Dropbox: {dropbox_path}")
+                    return True
+                else:
+                    text = await resp.text()
+                    logger.error(f"Dropbox upload failed for {dropbox_path}: {resp.status} - {text[:300]}")
+                    return False
         except Exception as e:
             logger.error(f"Error uploading file to Dropbox: {e}")
             return False
@@ -248,7 +301,6 @@ class DropboxUploader:
             return None
 
         # Create path for screenshots with date folder structure
-        from datetime import datetime
         date_folder = datetime.now().strftime("%Y-%m-%d")
         dropbox_path = DropboxUploader.build_dropbox_path("screenshots", date_folder, filename)
         
@@ -257,6 +309,11 @@ class DropboxUploader:
     @staticmethod
     async def upload_screenshot_to_path(screenshot_bytes: bytes, dropbox_path: str) -> Optional[str]:
         """Upload screenshot bytes to specific Dropbox path. Returns Dropbox path on success."""
+        return await DropboxUploader.upload_stream(memoryview(screenshot_bytes), dropbox_path)
+
+    @staticmethod
+    async def upload_stream(data: memoryview, dropbox_path: str) -> Optional[str]:
+        """Upload a buffer to a specific Dropbox path without copying it. Returns Dropbox path on success."""
         if not settings.DROPBOX_ENABLED:
             logger.debug("Dropbox screenshot upload skipped - disabled")
             return None
@@ -286,21 +343,21 @@ class DropboxUploader:
         }
 
         try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(content_url, data=screenshot_bytes, headers={
-                    "Authorization": f"Bearer {token}",
-                    "Dropbox-API-Arg": json.dumps(args),
-                    "Content-Type": "application/octet-stream"
-                }) as resp:
-                    if resp.status == 200:
-                        response_data = await resp.json()
-                        actual_path = response_data.get("path_display", dropbox_path)
-                        logger.info(f"Screenshot uploaded to Dropbox: {actual_path}")
-                        return actual_path
-                    else:
-                        text = await resp.text()
-                        logger.error(f"Dropbox screenshot upload failed: {resp.status} - {text[:300]}")
-                        return None
+            session = DropboxUploader.get_session()
+            async with session.post(content_url, data=data, headers={
+                "Authorization": f"Bearer {token}",
+                "Dropbox-API-Arg": json.dumps(args),
+                "Content-Type": "application/octet-stream"
+            }, timeout=timeout) as resp:
+                if resp.status == 200:
+                    response_data = await resp.json()
+                    actual_path = response_data.get("path_display", dropbox_path)
+                    logger.info(f"Screenshot uploaded to Dropbox: {actual_path}")
+                    return actual_path
+                else:
+                    text = await resp.text()
+                    logger.error(f"Dropbox screenshot upload failed: {resp.status} - {text[:300]}")
+                    return None
         except Exception as e:
             logger.error(f"Error uploading screenshot to Dropbox: {e}")
             return None
@@ -264,25 +264,25 @@ class SystemHealthChecker:
         start_time = time.time()
         
         try:
-            # Check VNC dependencies
+            # Check VNC manager - its own children are the VNC processes, so there is
+            # no need to walk the whole process table with psutil
             vnc_processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    if any(vnc_name in proc.info['name'].lower() for vnc_name in ['xvfb', 'x11vnc', 'websockify', 'fluxbox']):
-                        vnc_processes.append({
-                            'pid': proc.info['pid'],
-                            'name': proc.info['name'],
-                            'cmdline': ' '.join(proc.info['cmdline'][:3]) if proc.info['cmdline'] else ''
-                        })
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-            
-            # Check VNC manager
             try:
-                from .vnc_manager import vnc_manager
+                from .vnc_manager import get_vnc_manager
+                vnc_manager = get_vnc_manager()
                 vnc_sessions = len(vnc_manager.sessions)
                 vnc_health = vnc_manager.health_check()
                 healthy_sessions = sum(1 for h in vnc_health.values() if h)
+                for session in vnc_manager.sessions.values():
+                    for process in (session.xvfb_process, session.fluxbox_process,
+                                    session.x11vnc_process, session.websockify_process):
+                        # returncode is filled in once the child has been reaped
+                        if process and process.returncode is None:
+                            vnc_processes.append({
+                                'pid': process.pid,
+                                'name': os.path.basename(process.args[0]),
+                                'cmdline': ' '.join(process.args[:3])
+                            })
             except Exception as e:
                 vnc_sessions = 0
                 healthy_sessions = 0
@@ -23,6 +23,10 @@ class LoginHandler:
         # Create turnstile handler with our settings
         self.turnstile_handler = create_turnstile_handler(user_agent=user_agent, proxy=proxy)
     
+    async def aclose(self):
+        """Release the turnstile handler's HTTP session"""
+        await self.turnstile_handler.aclose()
+    
     async def perform_login(self, page: Any, email: str, password: str) -> Tuple[bool, Dict[str, Any]]:
         """
         Perform the complete login process
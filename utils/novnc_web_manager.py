@@ -9,7 +9,7 @@ import json
 import logging
 from typing import Dict, List, Any
 from flask import Flask, render_template_string, jsonify, request, redirect, url_for
-from .vnc_manager import vnc_manager
+from .vnc_manager import get_vnc_manager
 from .vnc_browser_manager import vnc_browser_manager
 
 # Configure logging
@@ -74,6 +74,7 @@ class NoVNCWebManager:
         def api_health():
             """API endpoint for health check"""
             try:
+                vnc_manager = get_vnc_manager()
                 vnc_health = vnc_manager.health_check()
                 return jsonify({
                     'vnc_sessions': vnc_health,
@@ -86,6 +87,7 @@ class NoVNCWebManager:
         @self.app.route('/vnc/<session_id>')
         def vnc_viewer(session_id):
             """Direct VNC viewer for a session"""
+            vnc_manager = get_vnc_manager()
             session = vnc_manager.get_session(session_id)
             if not session:
                 return f"Session {session_id} not found", 404
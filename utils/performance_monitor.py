@@ -13,23 +13,37 @@ import threading
 from typing import Dict, Any, List, Optional, Callable
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from collections import deque
+from collections import OrderedDict, deque
 import functools
+import itertools
+from types import MappingProxyType
 
 from .logging_config import get_logger
 
 logger = get_logger('performance_monitor', separate_file=True)
 
-@dataclass
+# Performance score deductions for (cpu, memory, disk) usage: value * weight, capped
+SCORE_WEIGHTS = (0.5, 0.5, 0.1)
+SCORE_CAPS = (40.0, 30.0, 20.0)
+
+def calculate_performance_score(cpu_percent: float, memory_percent: float, disk_usage_percent: float) -> float:
+    """Calculate the 0-100 performance score for a set of usage percentages"""
+    deduction = sum(
+        min(value * weight, cap)
+        for value, weight, cap in zip((cpu_percent, memory_percent, disk_usage_percent), SCORE_WEIGHTS, SCORE_CAPS)
+    )
+    return max(0.0, 100.0 - deduction)
+
+@dataclass(slots=True)
 class PerformanceMetric:
     """Individual performance metric"""
-    timestamp: datetime
+    timestamp: float  # time.monotonic() seconds
     metric_name: str
     value: float
     unit: str
     context: Dict[str, Any] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class SystemSnapshot:
     """System resource snapshot"""
     timestamp: datetime
@@ -38,19 +52,26 @@ class SystemSnapshot:
     memory_used_mb: float
     memory_available_mb: float
     disk_usage_percent: float
-    network_bytes_sent: int
-    network_bytes_recv: int
+    network_sent_delta: int  # bytes since the previous recorded snapshot
+    network_recv_delta: int
     process_count: int
     load_average: Optional[List[float]] = None
 
 class PerformanceTracker:
     """Tracks performance metrics over time"""
     
+    BUCKET_SECONDS = 60
+    BUCKET_RETENTION = 24 * 60  # one day of per-minute buckets
+    MAX_TRACKED_FUNCTIONS = 512
+    
     def __init__(self, max_metrics: int = 10000):
         self.max_metrics = max_metrics
+        # Metrics recorded via add_metric; function timings live in function_buckets only
         self.metrics: deque = deque(maxlen=max_metrics)
         self.system_snapshots: deque = deque(maxlen=1000)
-        self.function_timings: Dict[str, deque] = {}
+        # Per-function running aggregates: [bucket, calls, total, min, max, failures] per
+        # minute, functions in LRU order
+        self.function_buckets: "OrderedDict[str, deque]" = OrderedDict()
         self.lock = threading.Lock()
     
     def add_metric(self, metric: PerformanceMetric):
@@ -65,30 +86,103 @@ class PerformanceTracker:
     
     def add_function_timing(self, function_name: str, duration: float, context: Dict[str, Any] = None):
         """Add function execution timing"""
+        timestamp = time.monotonic()
         with self.lock:
-            if function_name not in self.function_timings:
-                self.function_timings[function_name] = deque(maxlen=1000)
-            
-            metric = PerformanceMetric(
-                timestamp=datetime.now(),
-                metric_name=f"function_timing_{function_name}",
-                value=duration,
-                unit="seconds",
-                context=context or {}
-            )
-            
-            self.function_timings[function_name].append(metric)
-            self.metrics.append(metric)
+            if function_name in self.function_buckets:
+                self.function_buckets.move_to_end(function_name)
+            elif len(self.function_buckets) >= self.MAX_TRACKED_FUNCTIONS:
+                self.function_buckets.popitem(last=False)
+            failed = context is not None and context.get("success") is False
+            self._aggregate_timing(function_name, timestamp, duration, failed)
+    
+    def _aggregate_timing(self, function_name: str, timestamp: float, duration: float, failed: bool):
+        """Fold a timing into its function's current per-minute bucket (caller holds lock)"""
+        bucket_id = int(timestamp // self.BUCKET_SECONDS)
+        buckets = self.function_buckets.get(function_name)
+        if buckets is None:
+            buckets = self.function_buckets[function_name] = deque(maxlen=self.BUCKET_RETENTION)
+        
+        if buckets and buckets[-1][0] == bucket_id:
+            bucket = buckets[-1]
+            bucket[1] += 1
+            bucket[2] += duration
+            if duration < bucket[3]:
+                bucket[3] = duration
+            if duration > bucket[4]:
+                bucket[4] = duration
+            if failed:
+                bucket[5] += 1
+        else:
+            buckets.append([bucket_id, 1, duration, duration, duration, int(failed)])
+    
+    def _summarize_buckets(self, buckets: deque, cutoff_bucket: int) -> Optional[Dict[str, Any]]:
+        """Combine the buckets newer than cutoff_bucket, scanning from the newest (caller holds lock)"""
+        calls = 0
+        total = 0.0
+        min_duration = float("inf")
+        max_duration = 0.0
+        failures = 0
+        for bucket_id, bucket_calls, bucket_total, bucket_min, bucket_max, bucket_failures in reversed(buckets):
+            if bucket_id <= cutoff_bucket:
+                break
+            calls += bucket_calls
+            failures += bucket_failures
+            total += bucket_total
+            min_duration = min(min_duration, bucket_min)
+            max_duration = max(max_duration, bucket_max)
+        
+        if not calls:
+            return None
+        return {
+            "calls": calls,
+            "avg_duration": total / calls,
+            "max_duration": max_duration,
+            "min_duration": min_duration,
+            "total_duration": total,
+            "failures": failures
+        }
+    
+    def _summarize_network(self, snapshots: List[SystemSnapshot]) -> Dict[str, float]:
+        """Sum network deltas and derive byte rates over the span of the snapshots"""
+        # The first snapshot's delta covers time before the window starts
+        sent = sum(s.network_sent_delta for s in snapshots[1:])
+        recv = sum(s.network_recv_delta for s in snapshots[1:])
+        span = (snapshots[-1].timestamp - snapshots[0].timestamp).total_seconds()
+        return {
+            "bytes_sent": sent,
+            "bytes_recv": recv,
+            "sent_per_second": sent / span if span > 0 else 0.0,
+            "recv_per_second": recv / span if span > 0 else 0.0
+        }
     
     def get_metrics_summary(self, hours: int = 1) -> Dict[str, Any]:
         """Get summary of metrics for the specified time period"""
-        cutoff_time = datetime.now() - timedelta(hours=hours)
+        # Both cutoffs are loop invariants: compute them once from a single clock read each
+        now = datetime.now()
+        window_seconds = hours * 3600
+        cutoff_time = now - timedelta(seconds=window_seconds)
+        cutoff_monotonic = time.monotonic() - window_seconds
         
+        # Both deques are appended in time order, so only the tail inside the window is visited
         with self.lock:
-            recent_metrics = [m for m in self.metrics if m.timestamp > cutoff_time]
-            recent_snapshots = [s for s in self.system_snapshots if s.timestamp > cutoff_time]
+            recent_metrics = list(itertools.takewhile(
+                lambda m: m.timestamp > cutoff_monotonic, reversed(self.metrics)))
+            recent_snapshots = list(itertools.takewhile(
+                lambda s: s.timestamp > cutoff_time, reversed(self.system_snapshots)))
+        recent_snapshots.reverse()
         
-        if not recent_metrics and not recent_snapshots:
+        # Function timing summary
+        cutoff_bucket = int(cutoff_monotonic // self.BUCKET_SECONDS)
+        function_summary = {}
+        with self.lock:
+            for func_name, buckets in self.function_buckets.items():
+                stats = self._summarize_buckets(buckets, cutoff_bucket)
+                if stats:
+                    function_summary[func_name] = stats
+        
+        timing_calls = sum(stats["calls"] for stats in function_summary.values())
+        
+        if not recent_metrics and not recent_snapshots and not timing_calls:
             return {"message": "No metrics available for the specified period"}
         
         # System resource summary
@@ -108,41 +202,41 @@ class PerformanceTracker:
                     "max": max(memory_values),
                     "min": min(memory_values)
                 },
+                "network": self._summarize_network(recent_snapshots),
                 "snapshots_count": len(recent_snapshots)
             }
         
-        # Function timing summary
-        function_summary = {}
-        for func_name, timings in self.function_timings.items():
-            recent_timings = [t for t in timings if t.timestamp > cutoff_time]
-            if recent_timings:
-                durations = [t.value for t in recent_timings]
-                function_summary[func_name] = {
-                    "calls": len(recent_timings),
-                    "avg_duration": sum(durations) / len(durations),
-                    "max_duration": max(durations),
-                    "min_duration": min(durations),
-                    "total_duration": sum(durations)
-                }
-        
         return {
             "period_hours": hours,
-            "total_metrics": len(recent_metrics),
+            "total_metrics": len(recent_metrics) + timing_calls,
             "system_resources": system_summary,
             "function_timings": function_summary,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now.isoformat()
         }
 
 class PerformanceMonitor:
     """Main performance monitoring system"""
     
+    # Snapshot fields compared against thresholds, in vector order
+    THRESHOLD_FIELDS = (
+        ("cpu_percent", "High CPU usage"),
+        ("memory_percent", "High memory usage"),
+        ("disk_usage_percent", "High disk usage"),
+    )
+    
     def __init__(self, monitoring_interval: int = 30):
         self.monitoring_interval = monitoring_interval
         self.tracker = PerformanceTracker()
         self.monitoring_active = False
+        # Function timing decorators only record while monitoring is running
+        self.enabled = False
         self.monitor_thread: Optional[threading.Thread] = None
         self.alert_callbacks: List[Callable] = []
         
+        # Last absolute network counters, used to turn snapshots into deltas
+        self._last_net_sent: Optional[int] = None
+        self._last_net_recv: Optional[int] = None
+        
         # Performance thresholds
         self.thresholds = {
             "cpu_percent": 80.0,
@@ -150,6 +244,11 @@ class PerformanceMonitor:
             "disk_usage_percent": 90.0,
             "function_duration": 30.0  # seconds
         }
+        self._threshold_vec = self._build_threshold_vec()
+    
+    def _build_threshold_vec(self) -> tuple:
+        """Build the snapshot threshold vector in THRESHOLD_FIELDS order"""
+        return tuple(self.thresholds[name] for name, _ in self.THRESHOLD_FIELDS)
     
     def add_alert_callback(self, callback: Callable):
         """Add callback for performance alerts"""
@@ -158,6 +257,7 @@ class PerformanceMonitor:
     def set_threshold(self, metric: str, value: float):
         """Set performance threshold"""
         self.thresholds[metric] = value
+        self._threshold_vec = self._build_threshold_vec()
         logger.info(f"Set {metric} threshold to {value}")
     
     def start_monitoring(self):
@@ -167,6 +267,7 @@ class PerformanceMonitor:
             return
         
         self.monitoring_active = True
+        self.enabled = True
         self.monitor_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
         self.monitor_thread.start()
         logger.info(f"Started performance monitoring (interval: {self.monitoring_interval}s)")
@@ -174,6 +275,7 @@ class PerformanceMonitor:
     def stop_monitoring(self):
         """Stop performance monitoring"""
         self.monitoring_active = False
+        self.enabled = False
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5)
         logger.info("Stopped performance monitoring")
@@ -182,7 +284,7 @@ class PerformanceMonitor:
         """Main monitoring loop"""
         while self.monitoring_active:
             try:
-                snapshot = self._take_system_snapshot()
+                snapshot = self._take_system_snapshot(update_network_baseline=True)
                 self.tracker.add_system_snapshot(snapshot)
                 
                 # Check for threshold violations
@@ -191,11 +293,15 @@ class PerformanceMonitor:
                 time.sleep(self.monitoring_interval)
                 
             except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
+                logger.error("Error in monitoring loop: %s", e)
                 time.sleep(self.monitoring_interval)
     
-    def _take_system_snapshot(self) -> SystemSnapshot:
-        """Take a snapshot of current system resources"""
+    def _take_system_snapshot(self, update_network_baseline: bool = False) -> SystemSnapshot:
+        """Take a snapshot of current system resources
+        
+        Network traffic is reported as the delta from the last recorded snapshot;
+        only recorded snapshots advance that baseline.
+        """
         try:
             # CPU and memory
             cpu_percent = psutil.cpu_percent(interval=1)
@@ -206,6 +312,13 @@ class PerformanceMonitor:
             
             # Network
             network = psutil.net_io_counters()
+            sent_delta = recv_delta = 0
+            if self._last_net_sent is not None:
+                sent_delta = network.bytes_sent - self._last_net_sent
+                recv_delta = network.bytes_recv - self._last_net_recv
+            if update_network_baseline:
+                self._last_net_sent = network.bytes_sent
+                self._last_net_recv = network.bytes_recv
             
             # Process count
             process_count = len(psutil.pids())
@@ -225,14 +338,14 @@ class PerformanceMonitor:
                 memory_used_mb=memory.used / (1024 * 1024),
                 memory_available_mb=memory.available / (1024 * 1024),
                 disk_usage_percent=disk.percent,
-                network_bytes_sent=network.bytes_sent,
-                network_bytes_recv=network.bytes_recv,
+                network_sent_delta=sent_delta,
+                network_recv_delta=recv_delta,
                 process_count=process_count,
                 load_average=load_avg
             )
             
         except Exception as e:
-            logger.error(f"Error taking system snapshot: {e}")
+            logger.error("Error taking system snapshot: %s", e)
             # Return minimal snapshot
             return SystemSnapshot(
                 timestamp=datetime.now(),
@@ -241,36 +354,50 @@ class PerformanceMonitor:
                 memory_used_mb=0.0,
                 memory_available_mb=0.0,
                 disk_usage_percent=0.0,
-                network_bytes_sent=0,
-                network_bytes_recv=0,
+                network_sent_delta=0,
+                network_recv_delta=0,
                 process_count=0
             )
     
     def _check_thresholds(self, snapshot: SystemSnapshot):
         """Check if any thresholds are violated"""
-        alerts = []
-        
-        if snapshot.cpu_percent > self.thresholds["cpu_percent"]:
-            alerts.append(f"High CPU usage: {snapshot.cpu_percent:.1f}%")
-        
-        if snapshot.memory_percent > self.thresholds["memory_percent"]:
-            alerts.append(f"High memory usage: {snapshot.memory_percent:.1f}%")
-        
-        if snapshot.disk_usage_percent > self.thresholds["disk_usage_percent"]:
-            alerts.append(f"High disk usage: {snapshot.disk_usage_percent:.1f}%")
+        snap_vec = (snapshot.cpu_percent, snapshot.memory_percent, snapshot.disk_usage_percent)
+        alerts = [
+            f"{label}: {value:.1f}%"
+            for (_, label), value, limit in zip(self.THRESHOLD_FIELDS, snap_vec, self._threshold_vec)
+            if value > limit
+        ]
         
         # Send alerts
         for alert in alerts:
-            logger.warning(f"Performance alert: {alert}")
+            logger.warning("Performance alert: %s", alert)
             self._send_alert(alert, snapshot)
     
+    def scan_threshold_violations(self, hours: int = 1) -> Dict[str, List[str]]:
+        """Retroactively scan stored snapshots for threshold violations
+        
+        Returns a mapping of snapshot field name to the ISO timestamps of the
+        snapshots that exceeded its threshold.
+        """
+        cutoff_time = datetime.now() - timedelta(hours=hours)
+        with self.tracker.lock:
+            snapshots = [s for s in self.tracker.system_snapshots if s.timestamp > cutoff_time]
+        
+        violations: Dict[str, List[str]] = {name: [] for name, _ in self.THRESHOLD_FIELDS}
+        for snapshot in snapshots:
+            snap_vec = (snapshot.cpu_percent, snapshot.memory_percent, snapshot.disk_usage_percent)
+            for (name, _), value, limit in zip(self.THRESHOLD_FIELDS, snap_vec, self._threshold_vec):
+                if value > limit:
+                    violations[name].append(snapshot.timestamp.isoformat())
+        return violations
+    
     def _send_alert(self, message: str, snapshot: SystemSnapshot):
         """Send performance alert"""
         for callback in self.alert_callbacks:
             try:
                 callback(message, snapshot)
             except Exception as e:
-                logger.error(f"Alert callback failed: {e}")
+                logger.error("Alert callback failed: %s", e)
     
     def get_current_status(self) -> Dict[str, Any]:
         """Get current system performance status"""
@@ -309,10 +436,9 @@ class PerformanceMonitor:
         score = 100
         if "current_snapshot" in current_status:
             snapshot = current_status["current_snapshot"]
-            score -= min(snapshot["cpu_percent"] / 2, 40)  # Max 40 points deduction
-            score -= min(snapshot["memory_percent"] / 2, 30)  # Max 30 points deduction
-            score -= min(snapshot["disk_usage_percent"] / 10, 20)  # Max 20 points deduction
-            score = max(0, score)
+            score = calculate_performance_score(
+                snapshot["cpu_percent"], snapshot["memory_percent"], snapshot["disk_usage_percent"]
+            )
         
         return {
             "report_period_hours": hours,
@@ -323,6 +449,22 @@ class PerformanceMonitor:
             "generated_at": datetime.now().isoformat()
         }
     
+    def get_score_history(self, hours: int = 24) -> List[Dict[str, Any]]:
+        """Performance score of every stored snapshot in the period"""
+        cutoff_time = datetime.now() - timedelta(hours=hours)
+        with self.tracker.lock:
+            snapshots = [s for s in self.tracker.system_snapshots if s.timestamp > cutoff_time]
+        
+        return [
+            {
+                "timestamp": s.timestamp.isoformat(),
+                "performance_score": round(
+                    calculate_performance_score(s.cpu_percent, s.memory_percent, s.disk_usage_percent), 1
+                )
+            }
+            for s in snapshots
+        ]
+    
     def _generate_recommendations(self, current_status: Dict[str, Any], summary: Dict[str, Any]) -> List[str]:
         """Generate performance recommendations"""
         recommendations = []
@@ -356,56 +498,49 @@ class PerformanceMonitor:
 # Global performance monitor instance
 performance_monitor = PerformanceMonitor()
 
+# Shared read-only context for successful timed calls
+_SUCCESS_CONTEXT = MappingProxyType({"success": True})
+
 # Decorator for timing function execution
 def time_function(category: str = "general"):
     """Decorator to time function execution"""
     def decorator(func):
+        key = f"{category}.{func.__name__}"
+        add_timing = performance_monitor.tracker.add_function_timing
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            if not performance_monitor.enabled:
+                return func(*args, **kwargs)
+            start_time = time.monotonic()
             try:
                 result = func(*args, **kwargs)
-                duration = time.time() - start_time
-                performance_monitor.tracker.add_function_timing(
-                    f"{category}.{func.__name__}",
-                    duration,
-                    {"success": True}
-                )
-                return result
             except Exception as e:
-                duration = time.time() - start_time
-                performance_monitor.tracker.add_function_timing(
-                    f"{category}.{func.__name__}",
-                    duration,
-                    {"success": False, "error": str(e)}
-                )
+                add_timing(key, time.monotonic() - start_time, {"success": False, "error": str(e)})
                 raise
+            add_timing(key, time.monotonic() - start_time, _SUCCESS_CONTEXT)
+            return result
         return wrapper
     return decorator
 
 def time_async_function(category: str = "general"):
     """Decorator to time async function execution"""
     def decorator(func):
+        key = f"{category}.{func.__name__}"
+        add_timing = performance_monitor.tracker.add_function_timing
+        
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
-            start_time = time.time()
+            if not performance_monitor.enabled:
+                return await func(*args, **kwargs)
+            start_time = time.monotonic()
             try:
                 result = await func(*args, **kwargs)
-                duration = time.time() - start_time
-                performance_monitor.tracker.add_function_timing(
-                    f"{category}.{func.__name__}",
-                    duration,
-                    {"success": True}
-                )
-                return result
             except Exception as e:
-                duration = time.time() - start_time
-                performance_monitor.tracker.add_function_timing(
-                    f"{category}.{func.__name__}",
-                    duration,
-                    {"success": False, "error": str(e)}
-                )
+                add_timing(key, time.monotonic() - start_time, {"success": False, "error": str(e)})
                 raise
+            add_timing(key, time.monotonic() - start_time, _SUCCESS_CONTEXT)
+            return result
         return wrapper
     return decorator
 
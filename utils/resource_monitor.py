@@ -6,6 +6,10 @@ import logging
 import psutil
 import time
 import asyncio
+import bisect
+import itertools
+from array import array
+from collections import deque
 from typing import Dict, Any, Optional, Callable
 from dataclasses import dataclass
 from config.settings import ENABLE_RESOURCE_MONITORING, DEBUG_ENHANCED_FEATURES
@@ -13,7 +17,7 @@ from config.settings import ENABLE_RESOURCE_MONITORING, DEBUG_ENHANCED_FEATURES
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ResourceAlert:
     """Resource alert information"""
     alert_type: str
@@ -26,12 +30,16 @@ class ResourceAlert:
 class ResourceMonitor:
     """Centralized resource monitoring for the application"""
     
+    MAX_ALERTS = 10_000
+    
     def __init__(self):
         self.process = psutil.Process() if ENABLE_RESOURCE_MONITORING else None
         self.initial_memory = (self.process.memory_info().rss / 1024 / 1024 
                               if self.process else 0)  # MB
         self.start_time = time.time()
-        self.alerts: list[ResourceAlert] = []
+        self.alerts: deque[ResourceAlert] = deque(maxlen=self.MAX_ALERTS)
+        # Sorted alert timestamps kept index-aligned with self.alerts for bisect lookups
+        self._alert_timestamps = array('d')
         self.alert_callbacks: list[Callable] = []
         
         # Thresholds
@@ -79,7 +87,7 @@ class ResourceMonitor:
                 'timestamp': time.time()
             }
         except Exception as e:
-            logger.warning(f"⚠️ Error getting system info: {e}")
+            logger.warning("⚠️ Error getting system info: %s", e)
             return {'monitoring_enabled': False, 'error': str(e)}
     
     def check_thresholds(self, info: Dict[str, Any]) -> list[ResourceAlert]:
@@ -94,65 +102,33 @@ class ResourceMonitor:
             system_info = info.get('system', {})
             timestamp = info.get('timestamp', time.time())
             
-            # Check process memory
-            memory_mb = process_info.get('memory_mb', 0)
-            if memory_mb > self.memory_critical_mb:
-                alerts.append(ResourceAlert(
-                    alert_type='memory_critical',
-                    message=f'Process memory usage critical: {memory_mb:.1f}MB',
-                    current_value=memory_mb,
-                    threshold=self.memory_critical_mb,
-                    timestamp=timestamp
-                ))
-            elif memory_mb > self.memory_warning_mb:
-                alerts.append(ResourceAlert(
-                    alert_type='memory_warning',
-                    message=f'Process memory usage high: {memory_mb:.1f}MB',
-                    current_value=memory_mb,
-                    threshold=self.memory_warning_mb,
-                    timestamp=timestamp
-                ))
-            
-            # Check process CPU
-            cpu_percent = process_info.get('cpu_percent', 0)
-            if cpu_percent > self.cpu_critical_percent:
-                alerts.append(ResourceAlert(
-                    alert_type='cpu_critical',
-                    message=f'Process CPU usage critical: {cpu_percent:.1f}%',
-                    current_value=cpu_percent,
-                    threshold=self.cpu_critical_percent,
-                    timestamp=timestamp
-                ))
-            elif cpu_percent > self.cpu_warning_percent:
-                alerts.append(ResourceAlert(
-                    alert_type='cpu_warning',
-                    message=f'Process CPU usage high: {cpu_percent:.1f}%',
-                    current_value=cpu_percent,
-                    threshold=self.cpu_warning_percent,
-                    timestamp=timestamp
-                ))
+            # (alert prefix, label, value, unit, warning threshold, critical threshold)
+            checks = (
+                ('memory', 'Process memory usage', process_info.get('memory_mb', 0), 'MB',
+                 self.memory_warning_mb, self.memory_critical_mb),
+                ('cpu', 'Process CPU usage', process_info.get('cpu_percent', 0), '%',
+                 self.cpu_warning_percent, self.cpu_critical_percent),
+                ('system_memory', 'System memory usage', system_info.get('memory_percent', 0), '%',
+                 80, 90),
+            )
             
-            # Check system memory
-            system_memory_percent = system_info.get('memory_percent', 0)
-            if system_memory_percent > 90:
-                alerts.append(ResourceAlert(
-                    alert_type='system_memory_critical',
-                    message=f'System memory usage critical: {system_memory_percent:.1f}%',
-                    current_value=system_memory_percent,
-                    threshold=90,
-                    timestamp=timestamp
-                ))
-            elif system_memory_percent > 80:
+            for prefix, label, value, unit, warning, critical in checks:
+                if value > critical:
+                    level, severity, threshold = 'critical', 'critical', critical
+                elif value > warning:
+                    level, severity, threshold = 'warning', 'high', warning
+                else:
+                    continue
                 alerts.append(ResourceAlert(
-                    alert_type='system_memory_warning',
-                    message=f'System memory usage high: {system_memory_percent:.1f}%',
-                    current_value=system_memory_percent,
-                    threshold=80,
+                    alert_type=f'{prefix}_{level}',
+                    message=f'{label} {severity}: {value:.1f}{unit}',
+                    current_value=value,
+                    threshold=threshold,
                     timestamp=timestamp
                 ))
             
         except Exception as e:
-            logger.warning(f"⚠️ Error checking thresholds: {e}")
+            logger.warning("⚠️ Error checking thresholds: %s", e)
         
         return alerts
     
@@ -164,22 +140,32 @@ class ResourceMonitor:
         """Trigger all alert callbacks for the given alerts"""
         for alert in alerts:
             self.alerts.append(alert)
+            self._alert_timestamps.append(alert.timestamp)
             
             # Log the alert
             if alert.alert_type.endswith('_critical'):
-                logger.error(f"🚨 {alert.message}")
+                logger.error("🚨 %s", alert.message)
             else:
-                logger.warning(f"⚠️ {alert.message}")
-            
-            # Call alert callbacks
-            for callback in self.alert_callbacks:
-                try:
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback(alert)
-                    else:
-                        callback(alert)
-                except Exception as e:
-                    logger.error(f"❌ Error in alert callback: {e}")
+                logger.warning("⚠️ %s", alert.message)
+        
+        # The deque drops its oldest alerts on overflow; drop their timestamps too
+        overflow = len(self._alert_timestamps) - len(self.alerts)
+        if overflow > 0:
+            del self._alert_timestamps[:overflow]
+        
+        # Run every callback for every alert concurrently; blocking callbacks go to a worker thread
+        tasks = [
+            callback(alert) if asyncio.iscoroutinefunction(callback) else asyncio.to_thread(callback, alert)
+            for callback in self.alert_callbacks
+            for alert in alerts
+        ]
+        if not tasks:
+            return
+        
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("❌ Error in alert callback: %s", result)
     
     async def check_resources(self) -> Optional[Dict[str, Any]]:
         """Check resources and trigger alerts if necessary"""
@@ -202,22 +188,28 @@ class ResourceMonitor:
         # Log resource info if debugging is enabled
         if DEBUG_ENHANCED_FEATURES and info.get('monitoring_enabled'):
             process_info = info.get('process', {})
-            logger.info(f"📊 Resource check: "
-                       f"Memory: {process_info.get('memory_mb', 0):.1f}MB "
-                       f"(+{process_info.get('memory_growth_mb', 0):.1f}MB), "
-                       f"CPU: {process_info.get('cpu_percent', 0):.1f}%")
+            logger.info("📊 Resource check: Memory: %.1fMB (+%.1fMB), CPU: %.1f%%",
+                        process_info.get('memory_mb', 0),
+                        process_info.get('memory_growth_mb', 0),
+                        process_info.get('cpu_percent', 0))
         
         return info
     
     def get_recent_alerts(self, minutes: int = 5) -> list[ResourceAlert]:
         """Get alerts from the last N minutes"""
         cutoff_time = time.time() - (minutes * 60)
-        return [alert for alert in self.alerts if alert.timestamp > cutoff_time]
+        index = bisect.bisect_right(self._alert_timestamps, cutoff_time)
+        recent = list(itertools.islice(reversed(self.alerts), len(self.alerts) - index))
+        recent.reverse()
+        return recent
     
     def clear_old_alerts(self, hours: int = 1):
         """Clear alerts older than N hours"""
         cutoff_time = time.time() - (hours * 3600)
-        self.alerts = [alert for alert in self.alerts if alert.timestamp > cutoff_time]
+        index = bisect.bisect_right(self._alert_timestamps, cutoff_time)
+        del self._alert_timestamps[:index]
+        for _ in range(index):
+            self.alerts.popleft()
     
     async def start_monitoring(self):
         """Start continuous resource monitoring"""
@@ -232,7 +224,7 @@ class ResourceMonitor:
                 await self.check_resources()
                 await asyncio.sleep(self.check_interval)
             except Exception as e:
-                logger.error(f"❌ Error in resource monitoring: {e}")
+                logger.error("❌ Error in resource monitoring: %s", e)
                 await asyncio.sleep(self.check_interval)
     
     def stop_monitoring(self):
@@ -3,14 +3,157 @@ Screenshot Monitor - Takes screenshots every 10 seconds during account checking
 Restricted to account checking process with user-specific folders
 """
 import asyncio
+import base64
+import contextlib
+import io
 import logging
 import time
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Any, Optional
 from playwright.async_api import Page
 from .dropbox_uploader import DropboxUploader
 
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Monitor screenshots are for human review only, so a lossy JPEG is plenty
+SCREENSHOT_QUALITY = 60
+SCREENSHOT_EXTENSION = "jpg"
+
+# Viewport-only JPEG capture: no full-page relayout and no PNG deflate in the browser
+CDP_SCREENSHOT_PARAMS = {"format": "jpeg", "quality": SCREENSHOT_QUALITY, "captureBeyondViewport": False}
+
+# Seconds between monitor screenshots
+MONITOR_INTERVAL = 10.0
+
+# Monitor screenshots whose dHash differs from the previous upload in fewer bits are skipped
+DEDUPE_HAMMING_THRESHOLD = 5
+
+# '@' and '.' are not kept in screenshot filenames
+_EMAIL_FILENAME_TABLE = str.maketrans({'@': '_at_', '.': '_'})
+
+
+def _dhash(image_bytes: bytes) -> int:
+    """64-bit difference hash of a screenshot (9x8 grayscale, left/right gradient per row)"""
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        # Let the JPEG decoder downscale while decoding instead of inflating the full viewport
+        img.draft("L", (72, 64))
+        pixels = img.convert("L").resize((9, 8), Image.BILINEAR).tobytes()
+    digest = 0
+    for row in range(0, 72, 9):
+        for i in range(row, row + 8):
+            digest = (digest << 1) | (pixels[i] > pixels[i + 1])
+    return digest
+
+
+class _UploadPool:
+    """
+    Dropbox upload workers shared by every ScreenshotMonitor in the process
+    Bounds concurrent uploads (and HTTPS connections) and applies back-pressure
+    through the bounded queue when Dropbox slows down
+    """
+    
+    WORKERS = 8
+    MAX_QUEUED = 1024
+    
+    _queue: Optional[asyncio.Queue] = None
+    _workers: list = []
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @classmethod
+    def _ensure_started(cls) -> asyncio.Queue:
+        """Start the workers on first use (or when running under a new event loop) and replace dead ones"""
+        loop = asyncio.get_running_loop()
+        if cls._loop is not loop:
+            cls._queue = asyncio.Queue(maxsize=cls.MAX_QUEUED)
+            cls._workers = [loop.create_task(cls._worker(cls._queue)) for _ in range(cls.WORKERS)]
+            cls._loop = loop
+        else:
+            for i, worker in enumerate(cls._workers):
+                if worker.done():
+                    cls._workers[i] = loop.create_task(cls._worker(cls._queue))
+        return cls._queue
+    
+    @classmethod
+    async def submit(cls, screenshot_bytes: bytes, dropbox_path: str, uploader: DropboxUploader) -> asyncio.Future:
+        """Queue an upload; the returned future resolves to the Dropbox path or None"""
+        queue = cls._ensure_started()
+        future = cls._loop.create_future()
+        await queue.put((screenshot_bytes, dropbox_path, uploader, future))
+        return future
+    
+    @staticmethod
+    async def _worker(queue: asyncio.Queue):
+        while True:
+            screenshot_bytes, dropbox_path, uploader, future = await queue.get()
+            try:
+                result = await uploader.upload_stream(memoryview(screenshot_bytes), dropbox_path)
+            except Exception as e:
+                logger.error("Error uploading screenshot %s: %s", dropbox_path, e)
+                result = None
+            except asyncio.CancelledError:
+                # Settle the future so no monitor waits on it forever
+                if not future.done():
+                    future.cancel()
+                raise
+            finally:
+                queue.task_done()
+            if not future.done():
+                future.set_result(result)
+
+
+class _GlobalTicker:
+    """
+    Single scheduler task shared by every running ScreenshotMonitor
+    Wakes on fixed MONITOR_INTERVAL boundaries and dispatches all registered
+    monitors, instead of each monitor keeping its own sleep loop
+    """
+    
+    _monitors: dict = {}
+    _task: Optional[asyncio.Task] = None
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @classmethod
+    def register(cls, monitor: "ScreenshotMonitor"):
+        loop = asyncio.get_running_loop()
+        if cls._loop is not loop:
+            cls._monitors = {}
+            cls._task = None
+            cls._loop = loop
+        cls._monitors[id(monitor)] = monitor
+        if cls._task is None or cls._task.done():
+            cls._task = loop.create_task(cls._run())
+    
+    @classmethod
+    def unregister(cls, monitor: "ScreenshotMonitor"):
+        cls._monitors.pop(id(monitor), None)
+        if not cls._monitors and cls._task is not None:
+            cls._task.cancel()
+            cls._task = None
+    
+    @classmethod
+    async def _run(cls):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while cls._monitors:
+            # Fixed-rate schedule: capture time does not accumulate as drift and
+            # missed boundaries are skipped rather than fired back to back
+            next_tick += MONITOR_INTERVAL
+            now = loop.time()
+            while next_tick < now:
+                next_tick += MONITOR_INTERVAL
+            await asyncio.sleep(next_tick - now)
+            # A monitor whose previous capture is still running skips this tick,
+            # so one slow page never delays the others
+            for monitor in tuple(cls._monitors.values()):
+                monitor._dispatch_tick()
+
+
 class ScreenshotMonitor:
     """
     Monitors account checking process and takes screenshots every 10 seconds
@@ -21,8 +164,19 @@ class ScreenshotMonitor:
         self.dropbox_uploader = dropbox_uploader
         self.user_id = user_id  # User-specific folder identification
         self.monitoring = False
-        self.monitor_task: Optional[asyncio.Task] = None
+        self.monitor_task: Optional[asyncio.Task] = None  # in-flight capture, if any
         self.screenshot_count = 0
+        self._cdp: Optional[Any] = None  # CDP session of the monitored page (Chromium only)
+        self._pending_uploads: set = set()  # futures of this monitor's queued uploads
+        # Per-run state, fixed in start_monitoring
+        self._email = ""
+        self._safe_email = ""
+        self._tick = None  # per-run capture coroutine function built by _make_tick
+        # /<base>/screenshots/user_ID, resolved once per monitor
+        self._path_prefix = DropboxUploader.build_dropbox_path("screenshots", f"user_{user_id}")
+        # "<prefix>/YYYY-MM-DD/" for the local date, recomputed only once the day rolls over
+        self._date_prefix = ""
+        self._date_prefix_expires = 0.0
         
     async def start_monitoring(self, page: Page, email: str, process_name: str = "account_check"):
         """
@@ -35,7 +189,7 @@ class ScreenshotMonitor:
         """
         # RESTRICTION: Only allow account checking process
         if process_name != "account_check":
-            logger.error(f"🚫 Screenshot monitoring DENIED for process '{process_name}' - Only 'account_check' allowed")
+            logger.error("🚫 Screenshot monitoring DENIED for process '%s' - Only 'account_check' allowed", process_name)
             return
             
         if self.monitoring:
@@ -44,12 +198,17 @@ class ScreenshotMonitor:
             
         self.monitoring = True
         self.screenshot_count = 0
-        logger.info(f"📸 {email} - Starting screenshot monitoring every 10 seconds for user {self.user_id}...")
-        
-        # Start the monitoring task
-        self.monitor_task = asyncio.create_task(
-            self._monitor_loop(page, email, process_name)
+        self._cdp = await self._open_cdp_session(page)
+        self._safe_email = email.translate(_EMAIL_FILENAME_TABLE)
+        self._email = email
+        self._tick = self._make_tick(
+            page, email, f"{process_name}_{{ts}}_{self._safe_email}_monitor_{{n:03d}}_{{el}}s_user_{self.user_id}"
         )
+        logger.info("📸 %s - Starting screenshot monitoring every 10 seconds for user %s...", email, self.user_id)
+        
+        # First screenshot right away, then on every global tick
+        self.monitor_task = asyncio.create_task(self._tick())
+        _GlobalTicker.register(self)
         
     async def stop_monitoring(self, page: Page = None, email: str = ""):
         """Stop screenshot monitoring and take final screenshot after 10 seconds"""
@@ -57,88 +216,147 @@ class ScreenshotMonitor:
             return
             
         self.monitoring = False
-        logger.info(f"📸 Stopping screenshot monitoring for user {self.user_id}...")
+        logger.info("📸 Stopping screenshot monitoring for user %s...", self.user_id)
+        _GlobalTicker.unregister(self)
         
         if self.monitor_task and not self.monitor_task.done():
             self.monitor_task.cancel()
-            try:
+            with contextlib.suppress(asyncio.CancelledError):
                 await self.monitor_task
-            except asyncio.CancelledError:
-                pass
+        logger.info("📸 %s - Screenshot monitoring stopped. Total screenshots: %s", self._email, self.screenshot_count)
         
-        # Take final screenshot 10 seconds after account checking completes
+        # Shielded so a cascading cancel (e.g. shutdown) cannot abandon the final
+        # screenshot or uploads half-way; the cleanup finishes in the background
+        await asyncio.shield(self._finalize(page, email))
+    
+    async def _finalize(self, page: Optional[Page], email: str):
+        """Take the final screenshot, flush queued uploads and release the CDP session"""
         if page and email:
+            await self._final_capture(page, email)
+        
+        # Wait for this monitor's screenshots still queued in the shared upload pool
+        if self._pending_uploads:
+            await asyncio.gather(*self._pending_uploads, return_exceptions=True)
+        
+        if self._cdp is not None:
+            with contextlib.suppress(Exception):
+                await self._cdp.detach()
+            self._cdp = None
+    
+    async def _final_capture(self, page: Page, email: str):
+        """Take final screenshot 10 seconds after account checking completes"""
+        try:
+            logger.info("📸 %s - Waiting 10 seconds before final screenshot...", email)
+            await asyncio.sleep(10)
+            
+            timestamp = int(time.time())
+            filename = f"final_screenshot_{timestamp}_{self._safe_email}_user_{self.user_id}"
+            
+            screenshot_bytes = await self._capture_screenshot(page)
+            
+            # Upload to user-specific folder
+            dropbox_path = await self._upload_to_user_folder(screenshot_bytes, filename)
+            
+            logger.info("📸 %s - Final screenshot taken for user %s: %s", email, self.user_id, dropbox_path)
+            
+        except Exception as e:
+            logger.error("📸 %s - Error taking final screenshot: %s", email, e)
+    
+    def _dispatch_tick(self):
+        """Start this monitor's capture for the current global tick unless the previous one is still running"""
+        if self.monitoring and (self.monitor_task is None or self.monitor_task.done()):
+            self.monitor_task = asyncio.create_task(self._tick())
+    
+    def _make_tick(self, page: Page, email: str, name_tmpl: str):
+        """
+        Build the per-tick capture coroutine for one monitoring run
+        Everything fixed for the run (page, capture method, filename template,
+        uploader) is bound once here instead of being looked up on every tick
+        """
+        capture = self._capture_screenshot
+        uploader = self.dropbox_uploader
+        format_name = name_tmpl.format
+        build_path = self._build_dropbox_path
+        track_upload = self._track_upload
+        submit = _UploadPool.submit
+        start_time = time.time()
+        last_hash: Optional[int] = None
+        
+        async def tick():
+            nonlocal last_hash
+            self.screenshot_count += 1
+            number = self.screenshot_count
             try:
-                logger.info(f"📸 {email} - Waiting 10 seconds before final screenshot...")
-                await asyncio.sleep(10)
-                
-                timestamp = int(time.time())
-                safe_email = email.replace('@', '_at_').replace('.', '_')
-                filename = f"final_screenshot_{timestamp}_{safe_email}_user_{self.user_id}"
+                now = time.time()
+                elapsed_seconds = int(now - start_time)
                 
-                screenshot_bytes = await page.screenshot(full_page=True)
+                # Take screenshot
+                screenshot_bytes = await capture(page)
                 
-                # Upload to user-specific folder
-                dropbox_path = await self._upload_to_user_folder(screenshot_bytes, filename)
+                # Idle pages produce near-identical frames; don't upload them again
+                if PIL_AVAILABLE:
+                    digest = await asyncio.to_thread(_dhash, screenshot_bytes)
+                    if last_hash is not None and (digest ^ last_hash).bit_count() < DEDUPE_HAMMING_THRESHOLD:
+                        logger.debug("📸 %s - Monitor screenshot #%s unchanged, skipping upload", email, number)
+                        return
+                    last_hash = digest
                 
-                logger.info(f"📸 {email} - Final screenshot taken for user {self.user_id}: {dropbox_path}")
+                # Hand off to the shared upload pool; uploads run off the ticker
+                filename = format_name(ts=int(now), n=number, el=elapsed_seconds)
+                future = await submit(screenshot_bytes, build_path(filename), uploader)
+                track_upload(future, email, number, elapsed_seconds)
                 
             except Exception as e:
-                logger.error(f"📸 {email} - Error taking final screenshot: {e}")
-                
-    async def _monitor_loop(self, page: Page, email: str, process_name: str):
-        """
-        Main monitoring loop that takes screenshots every 10 seconds
-        """
-        start_time = time.time()
+                logger.error("📸 %s - Error taking monitor screenshot #%s: %s", email, number, e)
+        
+        return tick
+    
+    def _track_upload(self, future: asyncio.Future, email: str, number: int, elapsed_seconds: int):
+        """Remember a queued upload and log its Dropbox path once it completes"""
+        self._pending_uploads.add(future)
         
+        def _done(done_future: asyncio.Future):
+            self._pending_uploads.discard(done_future)
+            if done_future.cancelled():
+                return
+            logger.info("📸 %s - Monitor screenshot #%s (%ss) for user %s: %s", email, number, elapsed_seconds, self.user_id, done_future.result())
+        
+        future.add_done_callback(_done)
+    
+    async def _open_cdp_session(self, page: Page) -> Optional[Any]:
+        """Open a CDP session for the page; None when the browser has no CDP (Firefox/Camoufox)"""
         try:
-            while self.monitoring:
-                try:
-                    self.screenshot_count += 1
-                    elapsed_seconds = int(time.time() - start_time)
-                    
-                    # Create descriptive filename with user ID
-                    timestamp = int(time.time())
-                    safe_email = email.replace('@', '_at_').replace('.', '_')
-                    filename = f"{process_name}_{timestamp}_{safe_email}_monitor_{self.screenshot_count:03d}_{elapsed_seconds}s_user_{self.user_id}"
-                    
-                    # Take screenshot
-                    screenshot_bytes = await page.screenshot(full_page=True)
-                    
-                    # Upload to user-specific folder
-                    dropbox_path = await self._upload_to_user_folder(screenshot_bytes, filename)
-                    
-                    logger.info(f"📸 {email} - Monitor screenshot #{self.screenshot_count} ({elapsed_seconds}s) for user {self.user_id}: {dropbox_path}")
-                    
-                except Exception as e:
-                    logger.error(f"📸 {email} - Error taking monitor screenshot #{self.screenshot_count}: {e}")
-                
-                # Wait 10 seconds before next screenshot (changed from 5 seconds)
-                try:
-                    await asyncio.sleep(10)
-                except asyncio.CancelledError:
-                    break
-                    
-        except asyncio.CancelledError:
-            logger.info(f"📸 {email} - Screenshot monitoring cancelled after {self.screenshot_count} screenshots")
+            return await page.context.new_cdp_session(page)
         except Exception as e:
-            logger.error(f"📸 {email} - Screenshot monitoring error: {e}")
-        finally:
-            logger.info(f"📸 {email} - Screenshot monitoring stopped. Total screenshots: {self.screenshot_count}")
+            logger.debug("📸 CDP session unavailable, using Playwright screenshots: %s", e)
+            return None
+    
+    async def _capture_screenshot(self, page: Page) -> bytes:
+        """Capture the current viewport as JPEG"""
+        if self._cdp is not None:
+            result = await self._cdp.send("Page.captureScreenshot", CDP_SCREENSHOT_PARAMS)
+            return base64.b64decode(result["data"])
+        return await page.screenshot(type="jpeg", quality=SCREENSHOT_QUALITY)
+    
+    def _current_date_prefix(self) -> str:
+        """User folder plus local YYYY-MM-DD folder, refreshed only after midnight"""
+        if time.time() >= self._date_prefix_expires:
+            now = datetime.now()
+            self._date_prefix = f"{self._path_prefix}/{now:%Y-%m-%d}/"
+            next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            self._date_prefix_expires = next_midnight.timestamp()
+        return self._date_prefix
+    
+    def _build_dropbox_path(self, filename: str) -> str:
+        """User-specific path: /screenshots/user_ID/date/filename"""
+        return f"{self._current_date_prefix()}{filename}.{SCREENSHOT_EXTENSION}"
     
     async def _upload_to_user_folder(self, screenshot_bytes: bytes, filename: str) -> Optional[str]:
         """Upload screenshot to user-specific folder in Dropbox"""
         try:
-            from datetime import datetime
-            date_folder = datetime.now().strftime("%Y-%m-%d")
-            
-            # Create user-specific path: /screenshots/user_ID/date/filename
-            dropbox_path = DropboxUploader.build_dropbox_path("screenshots", f"user_{self.user_id}", date_folder, f"{filename}.png")
-            
-            # Use the existing upload_screenshot method but with custom path
-            return await self.dropbox_uploader.upload_screenshot_to_path(screenshot_bytes, dropbox_path)
+            future = await _UploadPool.submit(screenshot_bytes, self._build_dropbox_path(filename), self.dropbox_uploader)
+            return await future
             
         except Exception as e:
-            logger.error(f"Error uploading to user folder: {e}")
-            return None
\ No newline at end of file
+            logger.error("Error uploading to user folder: %s", e)
+            return None
@@ -6,12 +6,17 @@ import asyncio
 import logging
 import sys
 import os
-from typing import Dict, Any, Optional, List
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Mapping
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Directory of the bundled turnstile solver, inserted into sys.path at most once per process
+_TURNSTILE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'solvers', 'turnstile_solver')
+_PATH_INITED = False
+
+@dataclass(slots=True, frozen=True)
 class SolverStatus:
     """Status of a solver"""
     name: str
@@ -20,207 +25,259 @@ class SolverStatus:
     error: Optional[str] = None
     version: Optional[str] = None
 
+class _SolverEntry:
+    """Registry slot holding a solver's status and its imported components"""
+    __slots__ = ('status', 'components')
+
+    def __init__(self, status: SolverStatus, components: Optional[Dict[str, Any]] = None):
+        self.status = status
+        self.components = components
+
+def _import_turnstile_solver() -> Dict[str, Any]:
+    """Import the primary Turnstile solver (blocking; run in an executor)"""
+    global _PATH_INITED
+    # Add turnstile_solver to path once; re-initialization must not grow sys.path
+    if not _PATH_INITED:
+        if _TURNSTILE_PATH not in sys.path:
+            sys.path.insert(0, _TURNSTILE_PATH)
+        _PATH_INITED = True
+    
+    from solvers.turnstile_solver import AsyncTurnstileSolver, TurnstileResult, ASYNC_SOLVER_AVAILABLE
+    
+    # Check if the async solver is actually available
+    if not ASYNC_SOLVER_AVAILABLE or AsyncTurnstileSolver is None:
+        raise ImportError("AsyncTurnstileSolver is not available - likely missing dependencies")
+    
+    # Test basic initialization (don't actually create browser yet)
+    # Just verify the class can be instantiated
+    try:
+        # This is a lightweight test - just check if we can create the class
+        test_solver = AsyncTurnstileSolver.__new__(AsyncTurnstileSolver)
+        if test_solver is None:
+            raise Exception("Failed to create AsyncTurnstileSolver instance")
+    except Exception as e:
+        raise Exception(f"AsyncTurnstileSolver instantiation failed: {e}")
+    
+    return {
+        'class': AsyncTurnstileSolver,
+        'result_class': TurnstileResult,
+        'initialized': True
+    }
+
+def _import_botsforge_solver() -> Dict[str, Any]:
+    """Import the BotsForge CloudFlare solver (blocking; run in an executor)"""
+    from solvers.cloudflare_botsforge.browser import Browser as CloudflareBrowser
+    from solvers.cloudflare_botsforge.models import CaptchaTask
+    
+    # Test initialization
+    test_browser = CloudflareBrowser()
+    
+    return {
+        'browser_class': CloudflareBrowser,
+        'task_class': CaptchaTask,
+        'initialized': True
+    }
+
+def _import_drission_bypasser() -> Dict[str, Any]:
+    """Import Patchright + Camoufox (blocking; run in an executor)"""
+    from patchright.async_api import async_playwright as patchright_async
+    from camoufox.async_api import AsyncCamoufox
+    
+    # Test that both Patchright and Camoufox are available
+    # Don't actually create instances, just test imports
+    return {
+        'patchright_async': patchright_async,
+        'camoufox_class': AsyncCamoufox,
+        'initialized': True
+    }
+
 class SolverManager:
     """Centralized manager for all Turnstile/Cloudflare solvers"""
     
     def __init__(self):
-        self.solvers = {}
+        # Single registry of status + components; solver_status mirrors it for the read-only view
+        self.registry: Dict[str, _SolverEntry] = {}
         self.solver_status = {}
+        self._status_view = MappingProxyType(self.solver_status)
         self.initialized = False
+        # Availability lookups, rebuilt once initialization finishes
+        self._available_set: frozenset = frozenset()
+        self._available_list: tuple = ()
         
     async def initialize_all_solvers(self) -> Dict[str, SolverStatus]:
         """Initialize all available solvers and return their status"""
         logger.info("🚀 Checking available Turnstile/Cloudflare solvers...")
         
-        # Check all available solvers (they run as separate API servers)
-        await self._initialize_turnstile_solver()
-        await self._initialize_botsforge_solver()
-        await self._initialize_drission_bypasser()
+        # Check all available solvers concurrently (they run as separate API servers).
+        # Each initializer records its own failure, so one broken solver never cancels the others.
+        results = await asyncio.gather(
+            self._initialize_turnstile_solver(),
+            self._initialize_botsforge_solver(),
+            self._initialize_drission_bypasser(),
+            self._initialize_dropbox_warmup(),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error("❌ Unexpected solver initialization error: %s", result)
         
+        self._available_list = tuple(name for name, status in self.solver_status.items() if status.available)
+        self._available_set = frozenset(self._available_list)
         self.initialized = True
         
         # Log summary
-        available_count = sum(1 for status in self.solver_status.values() if status.available)
+        available_count = len(self._available_list)
         total_count = len(self.solver_status)
         
-        logger.info(f"✅ Solver initialization complete: {available_count}/{total_count} solvers available")
+        logger.info("✅ Solver initialization complete: %s/%s solvers available", available_count, total_count)
         
         for name, status in self.solver_status.items():
             if status.available:
-                logger.info(f"   ✅ {name}: Ready")
+                logger.info("   ✅ %s: Ready", name)
             else:
-                logger.warning(f"   ❌ {name}: {status.error}")
+                logger.warning("   ❌ %s: %s", name, status.error)
         
         return self.solver_status
     
+    @staticmethod
+    async def _run_import(import_func) -> Dict[str, Any]:
+        """Run a blocking solver import in the default executor so the event loop stays responsive"""
+        return await asyncio.get_running_loop().run_in_executor(None, import_func)
+    
     async def _initialize_turnstile_solver(self):
         """Initialize the primary Turnstile solver"""
         try:
-            # Add turnstile_solver to path if needed
-            turnstile_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'solvers', 'turnstile_solver')
-            if turnstile_path not in sys.path:
-                sys.path.insert(0, turnstile_path)
-            
-            from solvers.turnstile_solver import AsyncTurnstileSolver, TurnstileResult, ASYNC_SOLVER_AVAILABLE
-            
-            # Check if the async solver is actually available
-            if not ASYNC_SOLVER_AVAILABLE or AsyncTurnstileSolver is None:
-                raise ImportError("AsyncTurnstileSolver is not available - likely missing dependencies")
-            
-            # Test basic initialization (don't actually create browser yet)
-            # Just verify the class can be instantiated
-            try:
-                # This is a lightweight test - just check if we can create the class
-                test_solver = AsyncTurnstileSolver.__new__(AsyncTurnstileSolver)
-                if test_solver is None:
-                    raise Exception("Failed to create AsyncTurnstileSolver instance")
-            except Exception as e:
-                raise Exception(f"AsyncTurnstileSolver instantiation failed: {e}")
-            
             # Store solver class for later use
-            self.solvers['turnstile_solver'] = {
-                'class': AsyncTurnstileSolver,
-                'result_class': TurnstileResult,
-                'initialized': True
-            }
+            components = await self._run_import(_import_turnstile_solver)
             
-            self.solver_status['turnstile_solver'] = SolverStatus(
+            self._register('turnstile_solver', SolverStatus(
                 name="Turnstile Solver (Primary)",
                 available=True,
                 initialized=True,
                 version="1.0"
-            )
+            ), components)
             
             logger.info("✅ Turnstile Solver initialized successfully")
             
         except ImportError as e:
             error_msg = f"Import failed: {e}"
-            self.solver_status['turnstile_solver'] = SolverStatus(
+            self._register('turnstile_solver', SolverStatus(
                 name="Turnstile Solver (Primary)",
                 available=False,
                 initialized=False,
                 error=error_msg
-            )
-            logger.warning(f"⚠️ Turnstile Solver not available: {error_msg}")
+            ))
+            logger.warning("⚠️ Turnstile Solver not available: %s", error_msg)
             
         except Exception as e:
             error_msg = f"Initialization failed: {e}"
-            self.solver_status['turnstile_solver'] = SolverStatus(
+            self._register('turnstile_solver', SolverStatus(
                 name="Turnstile Solver (Primary)",
                 available=False,
                 initialized=False,
                 error=error_msg
-            )
-            logger.error(f"❌ Turnstile Solver initialization error: {error_msg}")
+            ))
+            logger.error("❌ Turnstile Solver initialization error: %s", error_msg)
     
     async def _initialize_botsforge_solver(self):
         """Initialize the BotsForge CloudFlare solver"""
         try:
-            from solvers.cloudflare_botsforge.browser import Browser as CloudflareBrowser
-            from solvers.cloudflare_botsforge.models import CaptchaTask
-            
-            # Test initialization
-            test_browser = CloudflareBrowser()
-            
             # Store solver components for later use
-            self.solvers['botsforge'] = {
-                'browser_class': CloudflareBrowser,
-                'task_class': CaptchaTask,
-                'initialized': True
-            }
+            components = await self._run_import(_import_botsforge_solver)
             
-            self.solver_status['botsforge'] = SolverStatus(
+            self._register('botsforge', SolverStatus(
                 name="BotsForge CloudFlare (Fallback 1)",
                 available=True,
                 initialized=True,
                 version="1.0"
-            )
+            ), components)
             
             logger.info("✅ BotsForge CloudFlare solver initialized successfully")
             
         except ImportError as e:
             error_msg = f"Import failed: {e}"
-            self.solver_status['botsforge'] = SolverStatus(
+            self._register('botsforge', SolverStatus(
                 name="BotsForge CloudFlare (Fallback 1)",
                 available=False,
                 initialized=False,
                 error=error_msg
-            )
-            logger.warning(f"⚠️ BotsForge solver not available: {error_msg}")
+            ))
+            logger.warning("⚠️ BotsForge solver not available: %s", error_msg)
             
         except Exception as e:
             error_msg = f"Initialization failed: {e}"
-            self.solver_status['botsforge'] = SolverStatus(
+            self._register('botsforge', SolverStatus(
                 name="BotsForge CloudFlare (Fallback 1)",
                 available=False,
                 initialized=False,
                 error=error_msg
-            )
-            logger.error(f"❌ BotsForge solver initialization error: {error_msg}")
+            ))
+            logger.error("❌ BotsForge solver initialization error: %s", error_msg)
     
     async def _initialize_drission_bypasser(self):
         """Initialize the Patchright + Camoufox CloudFlare bypasser (replacing DrissionPage)"""
         try:
-            from patchright.async_api import async_playwright as patchright_async
-            from camoufox.async_api import AsyncCamoufox
-            
-            # Test that both Patchright and Camoufox are available
-            # Don't actually create instances, just test imports
-            
             # Store solver components for later use
-            self.solvers['drission_bypass'] = {
-                'patchright_async': patchright_async,
-                'camoufox_class': AsyncCamoufox,
-                'initialized': True
-            }
+            components = await self._run_import(_import_drission_bypasser)
             
-            self.solver_status['drission_bypass'] = SolverStatus(
+            self._register('drission_bypass', SolverStatus(
                 name="Patchright + Camoufox Bypasser (Fallback 2)",
                 available=True,
                 initialized=True,
                 version="1.0"
-            )
+            ), components)
             
             logger.info("✅ Patchright + Camoufox CloudFlare bypasser initialized successfully")
             
         except ImportError as e:
             error_msg = f"Import failed: {e}"
-            self.solver_status['drission_bypass'] = SolverStatus(
+            self._register('drission_bypass', SolverStatus(
                 name="Patchright + Camoufox Bypasser (Fallback 2)",
                 available=False,
                 initialized=False,
                 error=error_msg
-            )
-            logger.warning(f"⚠️ Patchright + Camoufox bypasser not available: {error_msg}")
+            ))
+            logger.warning("⚠️ Patchright + Camoufox bypasser not available: %s", error_msg)
             
         except Exception as e:
             error_msg = f"Initialization failed: {e}"
-            self.solver_status['drission_bypass'] = SolverStatus(
+            self._register('drission_bypass', SolverStatus(
                 name="Patchright + Camoufox Bypasser (Fallback 2)",
                 available=False,
                 initialized=False,
                 error=error_msg
-            )
-            logger.error(f"❌ Patchright + Camoufox bypasser initialization error: {error_msg}")
+            ))
+            logger.error("❌ Patchright + Camoufox bypasser initialization error: %s", error_msg)
+    
+    async def _initialize_dropbox_warmup(self):
+        """Open the shared Dropbox connection pool so the first screenshot upload skips the TLS handshake"""
+        try:
+            from .dropbox_uploader import DropboxUploader
+            await DropboxUploader.warmup()
+        except Exception as e:
+            logger.warning("⚠️ Dropbox warmup skipped: %s", e)
+    
+    def _register(self, solver_name: str, status: SolverStatus, components: Optional[Dict[str, Any]] = None):
+        """Record a solver's status and components in the registry"""
+        self.registry[solver_name] = _SolverEntry(status, components)
+        self.solver_status[solver_name] = status
     
-    def get_solver_status(self) -> Dict[str, SolverStatus]:
-        """Get the status of all solvers"""
-        return self.solver_status.copy()
+    def get_solver_status(self) -> Mapping[str, SolverStatus]:
+        """Get a read-only live view of the status of all solvers"""
+        return self._status_view
     
     def is_solver_available(self, solver_name: str) -> bool:
         """Check if a specific solver is available"""
-        status = self.solver_status.get(solver_name)
-        return status is not None and status.available
+        return solver_name in self._available_set
     
     def get_available_solvers(self) -> List[str]:
         """Get list of available solver names"""
-        return [name for name, status in self.solver_status.items() if status.available]
+        return list(self._available_list)
     
     def get_solver_components(self, solver_name: str) -> Optional[Dict[str, Any]]:
         """Get the components for a specific solver"""
-        if not self.is_solver_available(solver_name):
-            return None
-        return self.solvers.get(solver_name)
+        entry = self.registry.get(solver_name)
+        return entry.components if entry is not None and entry.status.available else None
     
     # Service startup methods removed - these are separate API servers that run independently
 
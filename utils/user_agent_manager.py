@@ -4,28 +4,52 @@ Replaces all hardcoded user agents with dynamic ones for better stealth
 """
 import logging
 import random
-from typing import Optional
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Seconds before the simple-useragent buckets are rebuilt
+UA_CACHE_TTL = 3600
+# User agents pre-drawn per bucket in one random.choices call
+UA_BATCH_SIZE = 1024
+
+_IOS_MARKERS = ('iPhone', 'iPad', 'iOS')
+
+# Fallback user agents, pre-split by bucket so no filtering happens at runtime
+_FALLBACK_DESKTOP = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+)
+_FALLBACK_MOBILE_ANDROID = (
+    "Mozilla/5.0 (Linux; Android 12; SM-G991B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; Pixel 6) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Mobile Safari/537.36",
+)
+_FALLBACK_MOBILE_IOS = (
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 16_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1",
+)
+_FALLBACK_MOBILE = _FALLBACK_MOBILE_ANDROID + _FALLBACK_MOBILE_IOS
+# Every fallback mobile UA is Chrome or Safari
+_FALLBACK_MOBILE_CHROME = _FALLBACK_MOBILE
+
+
+def _ua_string(ua) -> str:
+    """simple-useragent entries expose .string; fall back to str()"""
+    try:
+        return ua.string
+    except AttributeError:
+        return str(ua)
+
+
 class UserAgentManager:
     """Centralized user agent management using simple-useragent package"""
     
     def __init__(self):
         self._sua = None
-        self._fallback_desktop = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        ]
-        self._fallback_mobile = [
-            "Mozilla/5.0 (Linux; Android 12; SM-G991B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Mobile Safari/537.36",
-            "Mozilla/5.0 (iPhone; CPU iPhone OS 16_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Mobile/15E148 Safari/604.1",
-            "Mozilla/5.0 (Linux; Android 13; Pixel 6) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Mobile Safari/537.36",
-            "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
-        ]
-        
         # Initialize simple-useragent
         try:
             import simple_useragent as sua
@@ -33,64 +57,75 @@ class UserAgentManager:
             logger.debug("✅ simple-useragent initialized successfully")
         except ImportError:
             logger.warning("⚠️ simple-useragent not available, using fallback user agents")
+        
+        # Pre-bucketed UA strings, built on first use and refreshed every UA_CACHE_TTL
+        self._cache_ts: Optional[float] = None
+        self._desktop: Tuple[str, ...] = ()
+        self._mobile_all: Tuple[str, ...] = ()
+        self._mobile_android: Tuple[str, ...] = ()
+        self._mobile_ios: Tuple[str, ...] = ()
+        self._mobile_chrome: Tuple[str, ...] = ()
+        # Pre-drawn picks per bucket, discarded whenever the buckets are rebuilt
+        self._queues: Dict[str, deque] = {}
+        self._choices = random.choices
+    
+    def _fetch(self, kind: str, **kwargs) -> Tuple[str, ...]:
+        """UA strings from simple-useragent, or () when unavailable"""
+        if not self._sua:
+            return ()
+        try:
+            uas = self._sua.get(shuffle=True, **kwargs)
+            if isinstance(uas, list):
+                return tuple(_ua_string(ua) for ua in uas)
+        except Exception as e:
+            logger.warning("Error getting %s user agents from simple-useragent: %s", kind, e)
+        return ()
+    
+    def _maybe_refresh(self, ttl: float = UA_CACHE_TTL):
+        """Rebuild the UA buckets when they are missing or older than ttl seconds"""
+        now = time.monotonic()
+        if self._cache_ts is not None and now - self._cache_ts < ttl:
+            return
+        self._cache_ts = now
+        
+        self._desktop = self._fetch("desktop", desktop=True) or _FALLBACK_DESKTOP
+        self._queues.clear()
+        
+        mobile = self._fetch("mobile", mobile=True)
+        if not mobile:
+            # Fallback buckets are pre-split constants - nothing to filter
+            self._mobile_all = _FALLBACK_MOBILE
+            self._mobile_android = _FALLBACK_MOBILE_ANDROID
+            self._mobile_ios = _FALLBACK_MOBILE_IOS
+            self._mobile_chrome = _FALLBACK_MOBILE_CHROME
+            return
+        
+        self._mobile_all = mobile
+        # Android / iOS preference falls back to any mobile UA when the bucket is empty
+        self._mobile_android = tuple(ua for ua in mobile if 'Android' in ua) or mobile
+        self._mobile_ios = tuple(ua for ua in mobile if any(x in ua for x in _IOS_MARKERS)) or mobile
+        self._mobile_chrome = tuple(ua for ua in mobile if 'Chrome' in ua or 'Safari' in ua) or _FALLBACK_MOBILE_CHROME
+    
+    def _draw(self, bucket: str) -> str:
+        """Next pre-drawn UA from the named bucket, refilling in one batch when empty"""
+        queue = self._queues.get(bucket)
+        if not queue:
+            queue = self._queues[bucket] = deque(self._choices(getattr(self, bucket), k=UA_BATCH_SIZE))
+        return queue.popleft()
     
     def get_desktop_user_agent(self) -> str:
         """Get a random desktop user agent"""
-        if self._sua:
-            try:
-                uas = self._sua.get(desktop=True, shuffle=True)
-                if isinstance(uas, list) and uas:
-                    ua_obj = random.choice(uas)
-                    try:
-                        return ua_obj.string
-                    except AttributeError:
-                        return str(ua_obj)
-            except Exception as e:
-                logger.warning(f"Error getting desktop user agent from simple-useragent: {e}")
-        
-        # Fallback to hardcoded list
-        return random.choice(self._fallback_desktop)
+        self._maybe_refresh()
+        return self._draw('_desktop')
     
     def get_mobile_user_agent(self, prefer_android: bool = None) -> str:
         """Get a random mobile user agent, optionally preferring Android or iOS"""
-        if self._sua:
-            try:
-                uas = self._sua.get(mobile=True, shuffle=True)
-                if isinstance(uas, list) and uas:
-                    if prefer_android is True:
-                        # Prefer Android
-                        android_uas = [ua for ua in uas if 'Android' in str(ua)]
-                        if android_uas:
-                            ua_obj = random.choice(android_uas)
-                        else:
-                            ua_obj = random.choice(uas)
-                    elif prefer_android is False:
-                        # Prefer iOS
-                        ios_uas = [ua for ua in uas if any(x in str(ua) for x in ['iPhone', 'iPad', 'iOS'])]
-                        if ios_uas:
-                            ua_obj = random.choice(ios_uas)
-                        else:
-                            ua_obj = random.choice(uas)
-                    else:
-                        # Random mobile
-                        ua_obj = random.choice(uas)
-                    
-                    try:
-                        return ua_obj.string
-                    except AttributeError:
-                        return str(ua_obj)
-            except Exception as e:
-                logger.warning(f"Error getting mobile user agent from simple-useragent: {e}")
-        
-        # Fallback to hardcoded list
-        if prefer_android is True:
-            android_uas = [ua for ua in self._fallback_mobile if 'Android' in ua]
-            return random.choice(android_uas) if android_uas else random.choice(self._fallback_mobile)
-        elif prefer_android is False:
-            ios_uas = [ua for ua in self._fallback_mobile if any(x in ua for x in ['iPhone', 'iPad', 'iOS'])]
-            return random.choice(ios_uas) if ios_uas else random.choice(self._fallback_mobile)
-        else:
-            return random.choice(self._fallback_mobile)
+        self._maybe_refresh()
+        return self._draw(
+            '_mobile_android' if prefer_android is True else
+            '_mobile_ios' if prefer_android is False else
+            '_mobile_all'
+        )
     
     def get_random_user_agent(self) -> str:
         """Get a random mobile user agent (primarily iPhone and Android)"""
@@ -99,23 +134,8 @@ class UserAgentManager:
     
     def get_chrome_user_agent(self) -> str:
         """Get a Chrome-specific mobile user agent (Android Chrome or iOS Safari)"""
-        if self._sua:
-            try:
-                uas = self._sua.get(mobile=True, shuffle=True)
-                if isinstance(uas, list) and uas:
-                    chrome_uas = [ua for ua in uas if 'Chrome' in str(ua) or 'Safari' in str(ua)]
-                    if chrome_uas:
-                        ua_obj = random.choice(chrome_uas)
-                        try:
-                            return ua_obj.string
-                        except AttributeError:
-                            return str(ua_obj)
-            except Exception as e:
-                logger.warning(f"Error getting Chrome user agent from simple-useragent: {e}")
-        
-        # Fallback: Chrome-specific mobile from our lists
-        chrome_uas = [ua for ua in self._fallback_mobile if 'Chrome' in ua or 'Safari' in ua]
-        return random.choice(chrome_uas) if chrome_uas else self._fallback_mobile[0]
+        self._maybe_refresh()
+        return self._draw('_mobile_chrome')
 
 
 # Global instance for easy access
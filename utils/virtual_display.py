@@ -5,14 +5,25 @@ in headless server environments
 """
 
 import os
+import asyncio
 import subprocess
 import logging
 import time
 import signal
+import threading
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for a freshly spawned Xvfb to accept connections
+XVFB_START_TIMEOUT = 5
+# SIGTERM grace before SIGKILL on stop: polls x interval seconds
+XVFB_STOP_POLLS = 20
+XVFB_STOP_POLL_INTERVAL = 0.05
+# Strict xdpyinfo probe: hard timeout and how long its answer is reused
+XDPYINFO_TIMEOUT = 0.5
+XDPYINFO_CACHE_TTL = 1.0
+
 class VirtualDisplayManager:
     """Manages Xvfb virtual displays for browser automation"""
     
@@ -24,14 +35,27 @@ class VirtualDisplayManager:
         self.display_name = f":{display_num}"
         self.xvfb_process: Optional[subprocess.Popen] = None
         self.original_display = os.environ.get('DISPLAY')
+        # Serializes the check-then-spawn sequence so concurrent starts can't fork two Xvfbs
+        self._start_lock = threading.Lock()
+        # Last strict (xdpyinfo) probe, reused for XDPYINFO_CACHE_TTL seconds
+        self._last_probe_ts = 0.0
+        self._last_probe_res = False
         
     def start_virtual_display(self) -> bool:
         """Start Xvfb virtual display"""
+        with self._start_lock:
+            return self._start_virtual_display()
+    
+    async def astart(self) -> bool:
+        """Start Xvfb virtual display from async code without blocking the event loop"""
+        return await asyncio.to_thread(self.start_virtual_display)
+    
+    def _start_virtual_display(self) -> bool:
         try:
             logger.info(f"🖥️ Starting virtual display {self.display_name} ({self.width}x{self.height})")
             
-            # Check if display is already running
-            if self.is_display_running():
+            # Check if display is already running - strict, stale lock files must not count
+            if self.is_display_running(strict=True):
                 logger.info(f"✅ Virtual display {self.display_name} already running")
                 os.environ['DISPLAY'] = self.display_name
                 return True
@@ -52,13 +76,15 @@ class VirtualDisplayManager:
                 cmd,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
-                preexec_fn=os.setsid  # Create new process group
+                # New session/process group without a preexec_fn, so the spawn skips
+                # running Python in the child; our fds are non-inheritable anyway
+                start_new_session=True,
+                close_fds=False
             )
             
-            # Wait for display to start
-            time.sleep(2)
-            
-            if self.is_display_running():
+            # Wait for display to start - poll instead of a fixed sleep; Xvfb is
+            # usually up in well under a second
+            if self._wait_for_display():
                 os.environ['DISPLAY'] = self.display_name
                 logger.info(f"✅ Virtual display {self.display_name} started successfully")
                 return True
@@ -74,45 +100,107 @@ class VirtualDisplayManager:
         """Stop Xvfb virtual display"""
         try:
             if self.xvfb_process:
-                logger.info(f"🛑 Stopping virtual display {self.display_name}")
-                
-                # Terminate the process group
-                try:
-                    os.killpg(os.getpgid(self.xvfb_process.pid), signal.SIGTERM)
-                    self.xvfb_process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    # Force kill if it doesn't terminate gracefully
-                    os.killpg(os.getpgid(self.xvfb_process.pid), signal.SIGKILL)
-                    self.xvfb_process.wait()
-                
-                self.xvfb_process = None
-                logger.info(f"✅ Virtual display {self.display_name} stopped")
+                pgid = self._terminate_xvfb()
+                for _ in range(XVFB_STOP_POLLS):
+                    if self.xvfb_process.poll() is not None:
+                        break
+                    time.sleep(XVFB_STOP_POLL_INTERVAL)
+                else:
+                    self._kill_xvfb(pgid)
+                self._xvfb_stopped()
+            
+            self._restore_display()
+            return True
             
-            # Restore original DISPLAY
-            if self.original_display:
-                os.environ['DISPLAY'] = self.original_display
-            elif 'DISPLAY' in os.environ:
-                del os.environ['DISPLAY']
+        except Exception as e:
+            logger.error(f"❌ Error stopping virtual display: {e}")
+            return False
+    
+    async def astop(self) -> bool:
+        """Stop Xvfb virtual display without blocking the event loop"""
+        try:
+            if self.xvfb_process:
+                pgid = self._terminate_xvfb()
+                for _ in range(XVFB_STOP_POLLS):
+                    if self.xvfb_process.poll() is not None:
+                        break
+                    await asyncio.sleep(XVFB_STOP_POLL_INTERVAL)
+                else:
+                    self._kill_xvfb(pgid)
+                self._xvfb_stopped()
             
+            self._restore_display()
             return True
             
         except Exception as e:
             logger.error(f"❌ Error stopping virtual display: {e}")
             return False
     
-    def is_display_running(self) -> bool:
-        """Check if the virtual display is running"""
+    def _terminate_xvfb(self) -> int:
+        """SIGTERM the Xvfb process group; returns the group id for a later SIGKILL"""
+        logger.info(f"🛑 Stopping virtual display {self.display_name}")
+        pgid = os.getpgid(self.xvfb_process.pid)
+        os.killpg(pgid, signal.SIGTERM)
+        return pgid
+    
+    def _kill_xvfb(self, pgid: int):
+        """Force kill if Xvfb did not terminate gracefully"""
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.xvfb_process.poll()
+    
+    def _xvfb_stopped(self):
+        self.xvfb_process = None
+        self._last_probe_ts = 0.0  # cached probe no longer reflects reality
+        logger.info(f"✅ Virtual display {self.display_name} stopped")
+    
+    def _restore_display(self):
+        """Restore original DISPLAY"""
+        if self.original_display:
+            os.environ['DISPLAY'] = self.original_display
+        elif 'DISPLAY' in os.environ:
+            del os.environ['DISPLAY']
+    
+    def _wait_for_display(self) -> bool:
+        """Poll until the display answers, Xvfb exits, or XVFB_START_TIMEOUT passes"""
+        deadline = time.monotonic() + XVFB_START_TIMEOUT
+        delay = 0.05
+        while time.monotonic() < deadline:
+            if self.is_display_running():
+                return True
+            if self.xvfb_process and self.xvfb_process.poll() is not None:
+                return False  # Xvfb died (e.g. display already taken)
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        return self.is_display_running()
+    
+    def is_display_running(self, strict: bool = False) -> bool:
+        """
+        Check if the virtual display is running. The default check stats the X11
+        socket and lock file; strict=True connects with xdpyinfo, which also
+        rejects files left behind by a crashed server.
+        """
+        if not strict:
+            return (os.path.exists(f"/tmp/.X11-unix/X{self.display_num}")
+                    and os.path.exists(f"/tmp/.X{self.display_num}-lock"))
+        now = time.monotonic()
+        if now - self._last_probe_ts < XDPYINFO_CACHE_TTL:
+            return self._last_probe_res
         try:
-            # Try to connect to the display
+            # Try to connect to the display; a healthy server answers in milliseconds
             result = subprocess.run(
                 ['xdpyinfo', '-display', self.display_name],
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
-                timeout=5
+                timeout=XDPYINFO_TIMEOUT
             )
-            return result.returncode == 0
+            running = result.returncode == 0
         except (subprocess.TimeoutExpired, FileNotFoundError):
-            return False
+            running = False
+        self._last_probe_ts, self._last_probe_res = now, running
+        return running
     
     def __enter__(self):
         """Context manager entry"""
@@ -128,18 +216,26 @@ class VirtualDisplayManager:
 # Global instance for easy access
 _virtual_display_manager: Optional[VirtualDisplayManager] = None
 
+_manager_lock = threading.Lock()
+
 def get_virtual_display_manager() -> VirtualDisplayManager:
     """Get or create global virtual display manager"""
     global _virtual_display_manager
-    if _virtual_display_manager is None:
-        _virtual_display_manager = VirtualDisplayManager()
-    return _virtual_display_manager
+    with _manager_lock:
+        if _virtual_display_manager is None:
+            _virtual_display_manager = VirtualDisplayManager()
+        return _virtual_display_manager
 
 def ensure_virtual_display() -> bool:
     """Ensure virtual display is running"""
     manager = get_virtual_display_manager()
     return manager.start_virtual_display()
 
+async def aensure_virtual_display() -> bool:
+    """Ensure virtual display is running, without blocking the event loop"""
+    manager = get_virtual_display_manager()
+    return await manager.astart()
+
 def cleanup_virtual_display() -> bool:
     """Cleanup virtual display"""
     global _virtual_display_manager
@@ -7,42 +7,71 @@ Integrates browser automation with VNC sessions for visual monitoring
 import os
 import asyncio
 import logging
+import weakref
+from pathlib import Path
 from typing import Optional, Dict, Any
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
-from .vnc_manager import vnc_manager, VNCSession
+from .vnc_manager import get_vnc_manager, VNCSession
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for a browser to close before giving up on it
+BROWSER_CLOSE_TIMEOUT = 10
+# Navigation timeout (ms) for VNC session pages
+NAV_TIMEOUT = 15000
+
+# Environment handed to VNC browsers: only what Chromium needs, captured once
+_ALLOWED_ENV = frozenset({
+    'PATH', 'HOME', 'LANG', 'LC_ALL', 'USER', 'SHELL', 'TMPDIR', 'TZ',
+    'XAUTHORITY', 'XDG_RUNTIME_DIR', 'FONTCONFIG_PATH'
+})
+_BASE_ENV = {k: v for k, v in os.environ.items() if k in _ALLOWED_ENV}
+
 class VNCBrowserManager:
     """Manages browser instances within VNC sessions"""
     
     def __init__(self):
         self.browser_sessions: Dict[str, Dict[str, Any]] = {}
+        # One Playwright driver shared by every session's browser; started on first use
+        self._playwright = None
+        self._pw_lock = asyncio.Lock()
+        # Sessions whose browser is connected, maintained from "disconnected" events
+        self._healthy: set = set()
+        # Public per-session summaries for list_sessions, kept in step with browser_sessions
+        self._listing_cache: Dict[str, Dict[str, Any]] = {}
+        # Per-session teardown locks; entries vanish once no coroutine holds them
+        self._session_locks = weakref.WeakValueDictionary()
+    
+    async def _get_playwright(self):
+        """Shared Playwright driver, started once under a lock"""
+        async with self._pw_lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            return self._playwright
     
     async def create_browser_session(self, user_id: str, session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Create a new browser session within a VNC display"""
         try:
             # Create VNC session first
-            vnc_session = vnc_manager.create_session(user_id, session_id)
+            vnc_session = await get_vnc_manager().acreate_session(user_id, session_id)
             if not vnc_session:
-                logger.error(f"❌ Failed to create VNC session for user {user_id}")
+                logger.error("❌ Failed to create VNC session for user %s", user_id)
                 return None
             
             # Get display environment
-            display = vnc_manager.get_display_for_session(vnc_session.session_id)
+            display = get_vnc_manager().get_display_for_session(vnc_session.session_id)
             if not display:
-                logger.error(f"❌ Failed to get display for session {vnc_session.session_id}")
-                vnc_manager.destroy_session(vnc_session.session_id)
+                logger.error("❌ Failed to get display for session %s", vnc_session.session_id)
+                get_vnc_manager().destroy_session(vnc_session.session_id)
                 return None
             
-            # Set up environment for browser
-            env = os.environ.copy()
-            env['DISPLAY'] = display
+            # Set up environment for browser - base snapshot plus this session's display
+            env = {**_BASE_ENV, 'DISPLAY': display}
             
-            # Launch Playwright with non-headless browser
-            playwright = await async_playwright().start()
+            # Launch a non-headless browser on the shared Playwright driver
+            playwright = await self._get_playwright()
             
             # Configure browser for VNC display
             browser = await playwright.chromium.launch(
@@ -59,43 +88,93 @@ class VNCBrowserManager:
                 env=env
             )
             
-            # Create browser context
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            
-            # Create initial page
-            page = await context.new_page()
+            # Create browser context and initial page
+            context, page = await self._new_context_page(browser)
             
             # Store session info
             session_info = {
                 'vnc_session': vnc_session,
-                'playwright': playwright,
                 'browser': browser,
                 'context': context,
                 'page': page,
                 'user_id': user_id,
                 'session_id': vnc_session.session_id,
                 'display': display,
-                'novnc_url': vnc_manager.get_novnc_url(vnc_session.session_id)
+                'novnc_url': get_vnc_manager().get_novnc_url(vnc_session.session_id)
             }
             
             self.browser_sessions[vnc_session.session_id] = session_info
+            self._listing_cache[vnc_session.session_id] = {
+                'user_id': user_id,
+                'display': display,
+                'novnc_url': session_info['novnc_url'],
+                'session_id': vnc_session.session_id
+            }
+            self._track_browser(vnc_session.session_id, browser)
             
-            logger.info(f"✅ Browser session created successfully:")
-            logger.info(f"   Session ID: {vnc_session.session_id}")
-            logger.info(f"   User ID: {user_id}")
-            logger.info(f"   Display: {display}")
-            logger.info(f"   noVNC URL: {session_info['novnc_url']}")
+            logger.info(
+                "✅ Browser session created successfully:\n"
+                "   Session ID: %s\n   User ID: %s\n   Display: %s\n   noVNC URL: %s",
+                vnc_session.session_id, user_id, display, session_info['novnc_url']
+            )
             
             return session_info
             
         except Exception as e:
-            logger.error(f"❌ Error creating browser session: {e}")
+            logger.error("❌ Error creating browser session: %s", e)
             # Cleanup on failure
             if 'vnc_session' in locals() and vnc_session:
-                vnc_manager.destroy_session(vnc_session.session_id)
+                get_vnc_manager().destroy_session(vnc_session.session_id)
+            return None
+    
+    def _track_browser(self, session_id: str, browser: Browser) -> None:
+        """Mark a session healthy until its browser emits the disconnected event"""
+        def on_disconnected(_browser):
+            if session_id in self._healthy:
+                self._healthy.discard(session_id)
+                logger.warning("⚠️ Browser disconnected for session %s", session_id)
+        
+        self._healthy.add(session_id)
+        browser.on("disconnected", on_disconnected)
+    
+    async def _new_context_page(self, browser: Browser):
+        """Fresh context + page on an already-running browser"""
+        context = await browser.new_context(
+            viewport={'width': 1920, 'height': 1080},
+            user_agent='Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        )
+        page = await context.new_page()
+        return context, page
+    
+    async def recycle_browser_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Give a session a clean context and page on its warm browser instead of
+        destroying and relaunching it. Browsers are bound to their session's
+        Xvfb display, so they are reused within a session, never across sessions.
+        """
+        session_info = self.browser_sessions.get(session_id)
+        if not session_info:
+            logger.warning("⚠️ Browser session %s not found", session_id)
+            return None
+        
+        browser = session_info.get('browser')
+        if not browser or not browser.is_connected():
+            # Browser died - fall back to a full relaunch
+            user_id = session_info['user_id']
+            await self.destroy_browser_session(session_id)
+            return await self.create_browser_session(user_id, session_id)
+        
+        try:
+            await asyncio.gather(
+                session_info['page'].close(),
+                session_info['context'].close(),
+                return_exceptions=True
+            )
+            session_info['context'], session_info['page'] = await self._new_context_page(browser)
+            logger.info("♻️ Browser session %s recycled", session_id)
+            return session_info
+        except Exception as e:
+            logger.error("❌ Error recycling browser session %s: %s", session_id, e)
             return None
     
     async def get_browser_session(self, session_id: str) -> Optional[Dict[str, Any]]:
@@ -104,116 +183,106 @@ class VNCBrowserManager:
     
     async def destroy_browser_session(self, session_id: str) -> bool:
         """Destroy a browser session and its VNC session"""
-        try:
-            if session_id not in self.browser_sessions:
-                logger.warning(f"⚠️ Browser session {session_id} not found")
-                return False
-            
-            session_info = self.browser_sessions[session_id]
-            
-            # Close browser components
+        lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
             try:
-                if session_info.get('page'):
-                    await session_info['page'].close()
-                if session_info.get('context'):
-                    await session_info['context'].close()
-                if session_info.get('browser'):
-                    await session_info['browser'].close()
-                if session_info.get('playwright'):
-                    await session_info['playwright'].stop()
+                # Claim the session in one step so a concurrent destroy can't close it twice
+                session_info = self.browser_sessions.pop(session_id, None)
+                if session_info is None:
+                    logger.warning("⚠️ Browser session %s not found", session_id)
+                    return False
+                self._listing_cache.pop(session_id, None)
+                
+                # Deliberate close - not a health event
+                self._healthy.discard(session_id)
+                
+                # Closing the browser closes its contexts and pages in one round-trip
+                try:
+                    if session_info.get('browser'):
+                        await asyncio.wait_for(session_info['browser'].close(), timeout=BROWSER_CLOSE_TIMEOUT)
+                except Exception as e:
+                    logger.warning("⚠️ Error closing browser components: %s", e)
+                
+                # Destroy VNC session
+                get_vnc_manager().destroy_session(session_id)
+                
+                logger.info("✅ Browser session %s destroyed successfully", session_id)
+                return True
+                
             except Exception as e:
-                logger.warning(f"⚠️ Error closing browser components: {e}")
-            
-            # Destroy VNC session
-            vnc_manager.destroy_session(session_id)
-            
-            # Remove from tracking
-            del self.browser_sessions[session_id]
-            
-            logger.info(f"✅ Browser session {session_id} destroyed successfully")
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ Error destroying browser session {session_id}: {e}")
-            return False
+                logger.error("❌ Error destroying browser session %s: %s", session_id, e)
+                return False
     
-    async def navigate_to_url(self, session_id: str, url: str) -> bool:
-        """Navigate to a URL in the specified session"""
+    async def navigate_to_url(self, session_id: str, url: str, wait_until: str = 'commit') -> bool:
+        """
+        Navigate to a URL in the specified session. Returns once the main-frame
+        response commits by default - later locator calls auto-wait for content;
+        pass wait_until='load' (or 'domcontentloaded') when the full page is needed.
+        """
         try:
             session_info = await self.get_browser_session(session_id)
             if not session_info:
-                logger.error(f"❌ Session {session_id} not found")
+                logger.error("❌ Session %s not found", session_id)
                 return False
             
             page = session_info['page']
-            await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+            await page.goto(url, wait_until=wait_until, timeout=NAV_TIMEOUT)
             
-            logger.info(f"✅ Navigated to {url} in session {session_id}")
+            logger.info("✅ Navigated to %s in session %s", url, session_id)
             return True
             
         except Exception as e:
-            logger.error(f"❌ Error navigating to {url} in session {session_id}: {e}")
+            logger.error("❌ Error navigating to %s in session %s: %s", url, session_id, e)
             return False
     
-    async def take_screenshot(self, session_id: str, filename: Optional[str] = None) -> Optional[bytes]:
-        """Take a screenshot of the browser session"""
+    async def take_screenshot(self, session_id: str, filename: Optional[str] = None,
+                              full_page: bool = False) -> Optional[bytes]:
+        """Take a screenshot of the browser session (viewport only unless full_page)"""
         try:
             session_info = await self.get_browser_session(session_id)
             if not session_info:
-                logger.error(f"❌ Session {session_id} not found")
+                logger.error("❌ Session %s not found", session_id)
                 return None
             
             page = session_info['page']
-            screenshot_bytes = await page.screenshot(full_page=True)
+            screenshot_bytes = await page.screenshot(full_page=full_page)
             
             if filename:
-                with open(filename, 'wb') as f:
-                    f.write(screenshot_bytes)
-                logger.info(f"📸 Screenshot saved to {filename}")
+                # Disk write off the event loop
+                await asyncio.to_thread(Path(filename).write_bytes, screenshot_bytes)
+                logger.info("📸 Screenshot saved to %s", filename)
             
             return screenshot_bytes
             
         except Exception as e:
-            logger.error(f"❌ Error taking screenshot for session {session_id}: {e}")
+            logger.error("❌ Error taking screenshot for session %s: %s", session_id, e)
             return None
     
     def list_sessions(self) -> Dict[str, Dict[str, Any]]:
-        """List all active browser sessions"""
-        return {
-            session_id: {
-                'user_id': info['user_id'],
-                'display': info['display'],
-                'novnc_url': info['novnc_url'],
-                'session_id': session_id
-            }
-            for session_id, info in self.browser_sessions.items()
-        }
+        """List all active browser sessions (summaries are built once, at creation)"""
+        return dict(self._listing_cache)
     
     async def cleanup_all_sessions(self) -> None:
         """Clean up all browser sessions"""
         logger.info("🧹 Cleaning up all browser sessions")
         session_ids = list(self.browser_sessions.keys())
-        for session_id in session_ids:
-            await self.destroy_browser_session(session_id)
+        await asyncio.gather(
+            *(self.destroy_browser_session(session_id) for session_id in session_ids),
+            return_exceptions=True
+        )
+        
+        # The shared driver outlives individual sessions; stop it last
+        async with self._pw_lock:
+            if self._playwright is not None:
+                try:
+                    await self._playwright.stop()
+                except Exception as e:
+                    logger.warning("⚠️ Error stopping Playwright: %s", e)
+                self._playwright = None
     
     async def health_check(self) -> Dict[str, bool]:
-        """Check health of all browser sessions"""
-        health_status = {}
-        
-        for session_id, session_info in self.browser_sessions.items():
-            try:
-                # Check if browser is still connected
-                browser = session_info.get('browser')
-                if browser and browser.is_connected():
-                    health_status[session_id] = True
-                else:
-                    health_status[session_id] = False
-                    logger.warning(f"⚠️ Browser disconnected for session {session_id}")
-            except Exception as e:
-                health_status[session_id] = False
-                logger.warning(f"⚠️ Health check failed for session {session_id}: {e}")
-        
-        return health_status
+        """Check health of all browser sessions (snapshot of disconnect events)"""
+        return {session_id: session_id in self._healthy for session_id in self.browser_sessions}
 
 # Global browser manager instance
 vnc_browser_manager = VNCBrowserManager()
@@ -227,11 +296,11 @@ async def main():
         session_info = await vnc_browser_manager.create_browser_session("test_user_456")
         if session_info:
             session_id = session_info['session_id']
-            logger.info(f"✅ Test browser session created: {session_id}")
-            logger.info(f"🌐 Access via: {session_info['novnc_url']}")
+            logger.info("✅ Test browser session created: %s", session_id)
+            logger.info("🌐 Access via: %s", session_info['novnc_url'])
             
             # Navigate to a test page
-            await vnc_browser_manager.navigate_to_url(session_id, "https://www.google.com")
+            await vnc_browser_manager.navigate_to_url(session_id, "https://www.google.com", wait_until='load')
             
             # Take a screenshot
             screenshot = await vnc_browser_manager.take_screenshot(session_id, "test_screenshot.png")
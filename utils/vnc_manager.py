@@ -6,21 +6,85 @@ Handles multiple VNC sessions for browser monitoring and interaction
 
 import os
 import sys
+import atexit
+import functools
+import resource
 import time
 import signal
 import subprocess
 import logging
 import asyncio
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+import socket
 import threading
-import psutil
+
+from config.settings import USE_UVLOOP, VNC_INPROCESS_PROXY, VNC_WARM_POOL_SIZE
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Seconds to wait for each session component to become reachable
+VNC_READY_TIMEOUT = 10
+# Seconds between readiness probes
+VNC_READY_POLL_INTERVAL = 0.05
+# Default Xvfb screen (WxHxDepth). VNC browsers open 1920x1080 windows and Xvfb
+# can't grow its framebuffer later, so smaller screens are opt-in per session
+VNC_SCREEN = "1920x1080x24"
+# x11vnc update pacing (ms). Tight pacing only pays off for interactive LAN use;
+# low_latency sessions get X11VNC_LOW_LATENCY_MS for both
+X11VNC_WAIT_MS = 30
+X11VNC_DEFER_MS = 30
+X11VNC_LOW_LATENCY_MS = 5
+# Soft fd limit for x11vnc - libvncserver walks every fd up to it at start-up
+X11VNC_NOFILE = 4096
+# x11vnc tuning fields a warm display can take on at attach time
+_X11VNC_TUNING = {'wait_ms': X11VNC_WAIT_MS, 'defer_ms': X11VNC_DEFER_MS, 'use_xdamage': True}
+# Seconds a session's processes get, together, to exit after SIGTERM
+PROCESS_STOP_TIMEOUT = 5
+
+
+def _x_socket_path(display_num: int) -> str:
+    """Unix socket Xvfb listens on for the given display"""
+    return f"/tmp/.X11-unix/X{display_num}"
+
+
+def _process_group_kwargs(pgid: int, preexec=None) -> dict:
+    """
+    Popen kwargs placing the child in process group pgid (0 = new group led by the
+    child), plus an optional extra preexec callable
+    """
+    kwargs = {"process_group": pgid}
+    if preexec:
+        kwargs["preexec_fn"] = preexec
+    return kwargs
+
+
+def _lower_nofile() -> None:
+    """Cap the child's soft RLIMIT_NOFILE; the parent's limit is untouched"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY or soft > X11VNC_NOFILE:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (X11VNC_NOFILE, hard))
+
+
+def _port_accepting(port: int) -> bool:
+    """True once something accepts TCP connections on localhost:port"""
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=VNC_READY_POLL_INTERVAL):
+            return True
+    except OSError:
+        return False
+
+
+def _uvloop_active() -> bool:
+    """True when the bot runs (or is about to run) on uvloop"""
+    policy = type(asyncio.get_event_loop_policy())
+    return USE_UVLOOP or policy.__module__.split('.')[0] == 'uvloop'
+
+
+@dataclass(slots=True)
 class VNCSession:
     """Represents a VNC session"""
     session_id: str
@@ -33,6 +97,18 @@ class VNCSession:
     websockify_process: Optional[subprocess.Popen] = None
     fluxbox_process: Optional[subprocess.Popen] = None
     is_active: bool = False
+    # Process group shared by all of the session's processes (led by Xvfb)
+    pgid: Optional[int] = None
+    screen: str = VNC_SCREEN
+    # x11vnc tuning: poll interval, update batching, and DAMAGE-driven change detection
+    wait_ms: int = X11VNC_WAIT_MS
+    defer_ms: int = X11VNC_DEFER_MS
+    use_xdamage: bool = True
+    # In-process noVNC proxy (aiohttp runner) and the loop it runs on, used instead of websockify
+    ws_proxy: Optional[Any] = None
+    ws_proxy_loop: Optional[asyncio.AbstractEventLoop] = None
+    # Environment shared by every client of this display, built on first spawn
+    env: Optional[Dict[str, str]] = field(default=None, repr=False)
 
 class VNCManager:
     """Manages multiple VNC sessions for noVNC integration"""
@@ -42,9 +118,31 @@ class VNCManager:
         self.base_vnc_port = base_vnc_port
         self.base_websocket_port = base_websocket_port
         self.sessions: Dict[str, VNCSession] = {}
+        # user_id -> that user's session ids (dict as an insertion-ordered set),
+        # kept in step with self.sessions
+        self._by_user: Dict[str, Dict[str, None]] = defaultdict(dict)
         self.max_sessions = 10
         self.novnc_path = "/workspace/project/Exo-Mass/noVNC"
-        self.lock = threading.Lock()
+        # Per-slot locks: concurrent allocations only contend on the same slot
+        self._slot_locks = [threading.Lock() for _ in range(self.max_sessions)]
+        self._slot_taken = [False] * self.max_sessions
+        # Slot after the last one handed out; the next search starts here
+        self._next_idx = 0
+        # Live children by pid -> (session, component name, process), for SIGCHLD
+        self._pid_to_session: Dict[int, Tuple[VNCSession, str, subprocess.Popen]] = {}
+        self._prev_sigchld = None
+        # (component, session id) for children the SIGCHLD handler saw die; logged by health_check
+        self._died: deque = deque(maxlen=256)
+        self._sigchld_installed = self._install_sigchld_handler()
+        # Fire-and-forget proxy shutdowns, referenced until they finish
+        self._bg_tasks: set = set()
+        # Idle Xvfb+fluxbox displays (slot reserved, no x11vnc yet) handed to new sessions
+        self.warm_pool_size = VNC_WARM_POOL_SIZE
+        self._warm: deque = deque()
+        self._warm_lock = threading.Lock()
+        self._refilling = False
+        self._refill_thread: Optional[threading.Thread] = None
+        self._pool_closed = False
         
         # Ensure noVNC directory exists
         if not os.path.exists(self.novnc_path):
@@ -53,184 +151,587 @@ class VNCManager:
     
     def _get_next_available_ports(self) -> Tuple[int, int, int]:
         """Get next available display, VNC port, and websocket port"""
-        with self.lock:
-            for i in range(self.max_sessions):
+        for offset in range(self.max_sessions):
+            i = (self._next_idx + offset) % self.max_sessions
+            slot_lock = self._slot_locks[i]
+            # Another thread is probing this slot - try the next one rather than wait
+            if not slot_lock.acquire(blocking=False):
+                continue
+            try:
+                if self._slot_taken[i]:
+                    continue
+                
                 display_num = self.base_display + i
                 vnc_port = self.base_vnc_port + i
                 websocket_port = self.base_websocket_port + i
                 
                 # Check if ports are available
-                if not self._is_port_in_use(vnc_port) and not self._is_port_in_use(websocket_port):
-                    return display_num, vnc_port, websocket_port
+                if self._is_port_in_use(vnc_port) or self._is_port_in_use(websocket_port):
+                    continue
+                
+                self._slot_taken[i] = True
+            finally:
+                slot_lock.release()
             
-            raise RuntimeError("No available ports for new VNC session")
+            self._next_idx = (i + 1) % self.max_sessions
+            return display_num, vnc_port, websocket_port
+        
+        raise RuntimeError("No available ports for new VNC session")
+    
+    def _release_slot(self, display_num: int) -> None:
+        """Return a session's slot to the pool"""
+        i = display_num - self.base_display
+        with self._slot_locks[i]:
+            self._slot_taken[i] = False
+    
+    def _install_sigchld_handler(self) -> bool:
+        """Have SIGCHLD mark sessions unhealthy; only possible from the main thread"""
+        if _uvloop_active():
+            # libuv owns SIGCHLD for the loop's subprocesses (Playwright's driver);
+            # replacing its handler would hide their exits, so health_check polls
+            logger.debug("uvloop in use, SIGCHLD handler not installed")
+            return False
+        try:
+            self._prev_sigchld = signal.signal(signal.SIGCHLD, self._on_sigchld)
+            return True
+        except (ValueError, AttributeError, OSError):
+            logger.debug("SIGCHLD handler not installed, health_check will poll")
+            return False
+    
+    def _on_sigchld(self, signum, frame) -> None:
+        """
+        Mark the owning session inactive when one of our children exits. Only our
+        own Popen objects are polled (waitpid on their pid), so children of other
+        components - Playwright, asyncio subprocesses - are never reaped here.
+        Flags only: logging from a signal handler can re-enter a half-written
+        record, so health_check reports the dead process instead.
+        """
+        for pid, (session, name, process) in list(self._pid_to_session.items()):
+            if process.poll() is None:
+                continue
+            self._pid_to_session.pop(pid, None)
+            session.is_active = False
+            self._died.append((name, session.session_id))
+        
+        if callable(self._prev_sigchld):
+            self._prev_sigchld(signum, frame)
+    
+    def _track_process(self, session: VNCSession, name: str, process: subprocess.Popen) -> subprocess.Popen:
+        """Register a freshly spawned component for SIGCHLD health updates"""
+        self._pid_to_session[process.pid] = (session, name, process)
+        return process
+    
+    def _untrack_session(self, session: VNCSession) -> None:
+        """Stop watching a session's children - deliberate shutdowns aren't health events"""
+        for process in (session.xvfb_process, session.fluxbox_process,
+                        session.x11vnc_process, session.websockify_process):
+            if process:
+                self._pid_to_session.pop(process.pid, None)
     
     def _is_port_in_use(self, port: int) -> bool:
-        """Check if a port is currently in use"""
+        """
+        Check if a port is currently in use by trying to bind it - one syscall, no root
+        needed. Unlike a /proc/net/tcp listener scan this also catches ports that are
+        bound but not yet listening, which is the state our own children pass through.
+        """
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+            try:
+                probe.bind(("", port))
+            except OSError:
+                return True
+        return False
+    
+    def _term_all(self, processes: List[Tuple[str, Optional[subprocess.Popen]]]) -> List[Tuple[str, subprocess.Popen]]:
+        """Send SIGTERM to every live process at once; returns the ones signalled"""
+        signalled = []
+        for name, process in processes:
+            if process and process.poll() is None:
+                try:
+                    process.terminate()
+                    signalled.append((name, process))
+                except OSError as e:
+                    logger.error(f"❌ Error terminating {name} process: {e}")
+        return signalled
+    
+    def _signal_group(self, session: VNCSession, sig: int) -> bool:
+        """Signal the session's whole process group; False if there is none to signal"""
+        if not session.pgid:
+            return False
         try:
-            for conn in psutil.net_connections():
-                if conn.laddr.port == port:
-                    return True
+            os.killpg(session.pgid, sig)
+            return True
+        except ProcessLookupError:
             return False
-        except Exception:
+        except PermissionError as e:
+            logger.warning(f"⚠️ Cannot signal process group {session.pgid}: {e}")
             return False
     
-    def _kill_process_safely(self, process: Optional[subprocess.Popen], name: str) -> None:
-        """Safely kill a process"""
-        if process and process.poll() is None:
+    def _wait_all(self, processes: List[Tuple[str, subprocess.Popen]], timeout: float = PROCESS_STOP_TIMEOUT) -> None:
+        """Wait for all processes against one shared deadline, then SIGKILL stragglers"""
+        deadline = time.monotonic() + timeout
+        for name, process in processes:
             try:
-                process.terminate()
-                process.wait(timeout=5)
+                process.wait(timeout=max(0, deadline - time.monotonic()))
                 logger.info(f"✅ {name} process terminated successfully")
             except subprocess.TimeoutExpired:
                 logger.warning(f"⚠️ {name} process didn't terminate, killing forcefully")
                 process.kill()
                 process.wait()
-            except Exception as e:
+            except OSError as e:
                 logger.error(f"❌ Error terminating {name} process: {e}")
     
-    def create_session(self, user_id: str, session_id: Optional[str] = None) -> Optional[VNCSession]:
-        """Create a new VNC session for a user"""
+    def _new_session(self, user_id: str, session_id: Optional[str], low_latency: bool = False,
+                     **options) -> Optional[VNCSession]:
+        """
+        Allocate ports and build a session object, or None when at capacity.
+        options are VNCSession tuning fields (screen, wait_ms, defer_ms, use_xdamage).
+        """
+        if len(self.sessions) >= self.max_sessions:
+            logger.error(f"❌ Maximum number of VNC sessions ({self.max_sessions}) reached")
+            return None
+        
+        if not session_id:
+            session_id = f"vnc_{user_id}_{int(time.time())}"
+        
+        if low_latency:
+            options.setdefault('wait_ms', X11VNC_LOW_LATENCY_MS)
+            options.setdefault('defer_ms', X11VNC_LOW_LATENCY_MS)
+        
+        # Get available ports
+        display_num, vnc_port, websocket_port = self._get_next_available_ports()
+        
         try:
-            if len(self.sessions) >= self.max_sessions:
-                logger.error(f"❌ Maximum number of VNC sessions ({self.max_sessions}) reached")
-                return None
-            
-            if not session_id:
-                session_id = f"vnc_{user_id}_{int(time.time())}"
-            
-            # Get available ports
-            display_num, vnc_port, websocket_port = self._get_next_available_ports()
-            
-            # Create session object
-            session = VNCSession(
+            return VNCSession(
                 session_id=session_id,
                 user_id=user_id,
                 display_num=display_num,
                 vnc_port=vnc_port,
-                websocket_port=websocket_port
+                websocket_port=websocket_port,
+                **options
             )
+        except TypeError:
+            # Unknown option - give the slot back before reporting it
+            self._release_slot(display_num)
+            raise
+    
+    def _spawn_xvfb(self, session: VNCSession) -> None:
+        """Start Xvfb (virtual framebuffer)"""
+        logger.info(f"🖥️ Starting Xvfb for display :{session.display_num}")
+        xvfb_cmd = [
+            "Xvfb", f":{session.display_num}",
+            "-screen", "0", session.screen,
+            "-ac", "+extension", "GLX", "+render", "-noreset",
+            # Clients all connect over the unix socket
+            "-nolisten", "tcp"
+        ]
+        session.xvfb_process = self._track_process(session, "Xvfb", subprocess.Popen(
+            xvfb_cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **_process_group_kwargs(0)
+        ))
+        # Xvfb leads the group; the other components join it so one killpg reaches them all
+        session.pgid = session.xvfb_process.pid
+    
+    def _display_env(self, session: VNCSession) -> Dict[str, str]:
+        """
+        One environment for every client of this display, so none can inherit
+        the parent's DISPLAY by mistake
+        """
+        if session.env is None:
+            session.env = {**os.environ, 'DISPLAY': f":{session.display_num}"}
+        return session.env
+    
+    def _spawn_fluxbox(self, session: VNCSession) -> None:
+        """Start Fluxbox window manager"""
+        logger.info(f"🪟 Starting Fluxbox for display :{session.display_num}")
+        session.fluxbox_process = self._track_process(session, "fluxbox", subprocess.Popen(
+            ["fluxbox"],
+            env=self._display_env(session),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **_process_group_kwargs(session.pgid)
+        ))
+    
+    def _spawn_vnc_clients(self, session: VNCSession, websockify: bool = True) -> None:
+        """Start x11vnc and (unless proxied in-process) websockify on a running display"""
+        display_num, vnc_port, websocket_port = session.display_num, session.vnc_port, session.websocket_port
+        env = self._display_env(session)
+        
+        # Start x11vnc
+        logger.info(f"📡 Starting x11vnc on port {vnc_port} for display :{display_num}")
+        x11vnc_cmd = [
+            "x11vnc",
+            "-display", f":{display_num}",
+            "-rfbport", str(vnc_port),
+            "-forever",
+            "-shared",
+            "-noxfixes",
+            "-noxrandr",
+            "-wait", str(session.wait_ms),
+            "-defer", str(session.defer_ms)
+        ]
+        if not session.use_xdamage:
+            x11vnc_cmd.append("-noxdamage")
+        session.x11vnc_process = self._track_process(session, "x11vnc", subprocess.Popen(
+            x11vnc_cmd,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **_process_group_kwargs(session.pgid, preexec=_lower_nofile)
+        ))
+        
+        if not websockify:
+            return
+        
+        # Start websockify for noVNC - it only dials x11vnc when a viewer connects
+        logger.info(f"🌐 Starting websockify on port {websocket_port}")
+        websockify_cmd = [
+            "websockify",
+            "--web", self.novnc_path,
+            str(websocket_port),
+            f"localhost:{vnc_port}"
+        ]
+        session.websockify_process = self._track_process(session, "websockify", subprocess.Popen(
+            websockify_cmd,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **_process_group_kwargs(session.pgid)
+        ))
+    
+    @staticmethod
+    def _readiness_checks(session: VNCSession):
+        """(name, process, probe) for each component that must come up after the X server"""
+        return [
+            ("x11vnc", session.x11vnc_process, lambda: _port_accepting(session.vnc_port)),
+            ("websockify", session.websockify_process, lambda: _port_accepting(session.websocket_port)),
+        ]
+    
+    @staticmethod
+    def _check_ready(name: str, process: Optional[subprocess.Popen], probe) -> bool:
+        """Run one readiness probe, failing fast if the process already exited"""
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{name} exited during start-up (code {process.returncode})")
+        return probe()
+    
+    def _wait_ready(self, name: str, process: Optional[subprocess.Popen], probe) -> None:
+        """Block until probe() passes, instead of sleeping a worst-case fixed time"""
+        deadline = time.monotonic() + VNC_READY_TIMEOUT
+        while not self._check_ready(name, process, probe):
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"{name} not ready after {VNC_READY_TIMEOUT}s")
+            time.sleep(VNC_READY_POLL_INTERVAL)
+    
+    async def _await_ready(self, name: str, process: Optional[subprocess.Popen], probe) -> None:
+        """Async twin of _wait_ready; probes off the event loop"""
+        deadline = time.monotonic() + VNC_READY_TIMEOUT
+        while not await asyncio.to_thread(self._check_ready, name, process, probe):
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"{name} not ready after {VNC_READY_TIMEOUT}s")
+            await asyncio.sleep(VNC_READY_POLL_INTERVAL)
+    
+    def _boot_display(self, session: VNCSession) -> None:
+        """Start Xvfb, wait for its socket, then start Fluxbox"""
+        self._spawn_xvfb(session)
+        display_num = session.display_num
+        self._wait_ready("Xvfb", session.xvfb_process, lambda: os.path.exists(_x_socket_path(display_num)))
+        self._spawn_fluxbox(session)
+    
+    async def _aboot_display(self, session: VNCSession) -> None:
+        """Async _boot_display"""
+        self._spawn_xvfb(session)
+        display_num = session.display_num
+        await self._await_ready("Xvfb", session.xvfb_process, lambda: os.path.exists(_x_socket_path(display_num)))
+        self._spawn_fluxbox(session)
+    
+    @staticmethod
+    def _display_alive(session: VNCSession) -> bool:
+        """True while a display's Xvfb and Fluxbox are both running"""
+        return all(process is not None and process.poll() is None
+                   for process in (session.xvfb_process, session.fluxbox_process))
+    
+    def _take_warm(self, user_id: str, session_id: Optional[str], low_latency: bool,
+                   options: dict, dead: List[VNCSession]) -> Optional[VNCSession]:
+        """
+        Claim a pre-booted display for a new session, or None to cold-start. Dead
+        displays found on the way are appended to dead for the caller to tear down.
+        """
+        if not self._warm or options.get('screen', VNC_SCREEN) != VNC_SCREEN:
+            return None
+        if len(self.sessions) >= self.max_sessions:
+            return None
+        unknown = set(options) - set(_X11VNC_TUNING) - {'screen'}
+        if unknown:
+            raise TypeError(f"Unknown VNC session option(s): {', '.join(sorted(unknown))}")
+        
+        while True:
+            with self._warm_lock:
+                if not self._warm:
+                    return None
+                session = self._warm.popleft()
+            if self._display_alive(session):
+                break
+            dead.append(session)
+        
+        session.session_id = session_id or f"vnc_{user_id}_{int(time.time())}"
+        session.user_id = user_id
+        tuning = dict(options)
+        if low_latency:
+            tuning.setdefault('wait_ms', X11VNC_LOW_LATENCY_MS)
+            tuning.setdefault('defer_ms', X11VNC_LOW_LATENCY_MS)
+        for field, default in _X11VNC_TUNING.items():
+            setattr(session, field, tuning.get(field, default))
+        
+        logger.info(f"♨️ Using warm display :{session.display_num} for session {session.session_id}")
+        return session
+    
+    def _schedule_refill(self) -> None:
+        """Top the warm pool back up in the background"""
+        if self.warm_pool_size <= 0:
+            return
+        with self._warm_lock:
+            if self._refilling or self._pool_closed:
+                return
+            self._refilling = True
+        self._refill_thread = threading.Thread(target=self._refill_pool, name="vnc-warm-pool", daemon=True)
+        self._refill_thread.start()
+    
+    def _refill_pool(self) -> None:
+        """Boot idle displays until the pool is full or the slots run out"""
+        try:
+            while True:
+                with self._warm_lock:
+                    if (self._pool_closed or len(self._warm) >= self.warm_pool_size
+                            or len(self.sessions) + len(self._warm) >= self.max_sessions):
+                        return
+                
+                session = None
+                try:
+                    session = self._new_session("warm", None)
+                    if not session:
+                        return
+                    self._boot_display(session)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not pre-boot a VNC display: {e}")
+                    if session:
+                        self._cleanup_session(session)
+                    return
+                
+                with self._warm_lock:
+                    closed = self._pool_closed
+                    if not closed:
+                        self._warm.append(session)
+                if closed:
+                    # Shut down while this display was booting
+                    self._cleanup_session(session)
+                    return
+                logger.info(f"♨️ Display :{session.display_num} ready in warm pool")
+        finally:
+            with self._warm_lock:
+                self._refilling = False
+    
+    def _return_to_pool(self, session: VNCSession) -> bool:
+        """
+        Park a finished session's display in the warm pool: only x11vnc and the
+        websocket side are stopped. False when the display can't or needn't be kept.
+        """
+        if session.screen != VNC_SCREEN or not self._display_alive(session):
+            return False
+        with self._warm_lock:
+            if self._pool_closed or len(self._warm) >= self.warm_pool_size:
+                return False
+        
+        for process in (session.x11vnc_process, session.websockify_process):
+            if process:
+                self._pid_to_session.pop(process.pid, None)
+        self._stop_ws_proxy(session)
+        self._wait_all(self._term_all([
+            ("websockify", session.websockify_process),
+            ("x11vnc", session.x11vnc_process),
+        ]))
+        session.x11vnc_process = None
+        session.websockify_process = None
+        session.is_active = False
+        
+        with self._warm_lock:
+            self._warm.append(session)
+        logger.info(f"♨️ Display :{session.display_num} returned to warm pool")
+        return True
+    
+    def warm_up(self) -> None:
+        """Fill the warm pool now instead of on the first session request"""
+        self._schedule_refill()
+    
+    def _register_session(self, session: VNCSession) -> VNCSession:
+        """Mark session as active and track it"""
+        session.is_active = True
+        # One shared string per user: index keys and session fields compare by identity first
+        session.user_id = sys.intern(session.user_id)
+        self.sessions[session.session_id] = session
+        self._by_user[session.user_id][session.session_id] = None
+        
+        logger.info(f"✅ VNC session created successfully:")
+        logger.info(f"   Session ID: {session.session_id}")
+        logger.info(f"   User ID: {session.user_id}")
+        logger.info(f"   Display: :{session.display_num}")
+        logger.info(f"   VNC Port: {session.vnc_port}")
+        logger.info(f"   WebSocket Port: {session.websocket_port}")
+        logger.info(f"   noVNC URL: http://localhost:{session.websocket_port}/vnc.html")
+        
+        return session
+    
+    def create_session(self, user_id: str, session_id: Optional[str] = None,
+                       low_latency: bool = False, **options) -> Optional[VNCSession]:
+        """
+        Create a new VNC session for a user. low_latency tightens x11vnc pacing for
+        interactive use; options override VNCSession tuning fields (screen, wait_ms,
+        defer_ms, use_xdamage).
+        """
+        session = None
+        try:
+            dead: List[VNCSession] = []
+            session = self._take_warm(user_id, session_id, low_latency, options, dead)
+            for stale in dead:
+                self._cleanup_session(stale)
+            if session is None:
+                session = self._new_session(user_id, session_id, low_latency, **options)
+                if not session:
+                    return None
+                self._boot_display(session)
             
-            # Start Xvfb (virtual framebuffer)
-            logger.info(f"🖥️ Starting Xvfb for display :{display_num}")
-            xvfb_cmd = [
-                "Xvfb", f":{display_num}",
-                "-screen", "0", "1920x1080x24",
-                "-ac", "+extension", "GLX", "+render", "-noreset"
-            ]
-            session.xvfb_process = subprocess.Popen(
-                xvfb_cmd,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-            
-            # Wait for Xvfb to start
-            time.sleep(2)
-            
-            # Start Fluxbox window manager
-            logger.info(f"🪟 Starting Fluxbox for display :{display_num}")
-            env = os.environ.copy()
-            env['DISPLAY'] = f":{display_num}"
-            session.fluxbox_process = subprocess.Popen(
-                ["fluxbox"],
-                env=env,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-            
-            # Wait for Fluxbox to start
-            time.sleep(1)
-            
-            # Start x11vnc
-            logger.info(f"📡 Starting x11vnc on port {vnc_port} for display :{display_num}")
-            x11vnc_cmd = [
-                "x11vnc",
-                "-display", f":{display_num}",
-                "-rfbport", str(vnc_port),
-                "-forever",
-                "-shared",
-                "-noxdamage",
-                "-noxfixes",
-                "-noxrandr",
-                "-wait", "5",
-                "-defer", "5"
-            ]
-            session.x11vnc_process = subprocess.Popen(
-                x11vnc_cmd,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-            
-            # Wait for x11vnc to start
-            time.sleep(2)
-            
-            # Start websockify for noVNC
-            logger.info(f"🌐 Starting websockify on port {websocket_port}")
-            websockify_cmd = [
-                "websockify",
-                "--web", self.novnc_path,
-                str(websocket_port),
-                f"localhost:{vnc_port}"
-            ]
-            session.websockify_process = subprocess.Popen(
-                websockify_cmd,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
+            self._spawn_vnc_clients(session)
+            for check in self._readiness_checks(session):
+                self._wait_ready(*check)
             
-            # Wait for websockify to start
-            time.sleep(2)
+            return self._register_session(session)
             
-            # Mark session as active
-            session.is_active = True
-            self.sessions[session_id] = session
+        except Exception as e:
+            logger.error(f"❌ Error creating VNC session: {e}")
+            # Cleanup on failure
+            if session:
+                self._cleanup_session(session)
+            return None
+        finally:
+            self._schedule_refill()
+    
+    async def acreate_session(self, user_id: str, session_id: Optional[str] = None,
+                              low_latency: bool = False, **options) -> Optional[VNCSession]:
+        """
+        Async create_session: readiness probes yield to the event loop, and x11vnc
+        and websockify are awaited concurrently.
+        """
+        session = None
+        try:
+            dead: List[VNCSession] = []
+            session = self._take_warm(user_id, session_id, low_latency, options, dead)
+            if dead:
+                # Stopping a display can block for PROCESS_STOP_TIMEOUT - keep it off the loop
+                await asyncio.gather(*(asyncio.to_thread(self._cleanup_session, stale) for stale in dead),
+                                     return_exceptions=True)
+            if session is None:
+                session = self._new_session(user_id, session_id, low_latency, **options)
+                if not session:
+                    return None
+                await self._aboot_display(session)
             
-            logger.info(f"✅ VNC session created successfully:")
-            logger.info(f"   Session ID: {session_id}")
-            logger.info(f"   User ID: {user_id}")
-            logger.info(f"   Display: :{display_num}")
-            logger.info(f"   VNC Port: {vnc_port}")
-            logger.info(f"   WebSocket Port: {websocket_port}")
-            logger.info(f"   noVNC URL: http://localhost:{websocket_port}/vnc.html")
+            self._spawn_vnc_clients(session, websockify=not VNC_INPROCESS_PROXY)
+            if VNC_INPROCESS_PROXY:
+                # Same URL layout as websockify: noVNC files plus /websockify on websocket_port
+                from .vnc_ws_proxy import start_ws_proxy
+                logger.info(f"🌐 Starting in-process noVNC proxy on port {session.websocket_port}")
+                session.ws_proxy = await start_ws_proxy(self.novnc_path, session.websocket_port, session.vnc_port)
+                session.ws_proxy_loop = asyncio.get_running_loop()
+            await asyncio.gather(*(self._await_ready(*check) for check in self._readiness_checks(session)))
             
-            return session
+            return self._register_session(session)
             
         except Exception as e:
             logger.error(f"❌ Error creating VNC session: {e}")
             # Cleanup on failure
-            if 'session' in locals():
-                self._cleanup_session(session)
+            if session:
+                await asyncio.to_thread(self._cleanup_session, session)
             return None
+        finally:
+            self._schedule_refill()
     
     def _cleanup_session(self, session: VNCSession) -> None:
         """Clean up a VNC session"""
         logger.info(f"🧹 Cleaning up VNC session {session.session_id}")
+        self._untrack_session(session)
         
-        # Kill processes in reverse order
-        self._kill_process_safely(session.websockify_process, "websockify")
-        self._kill_process_safely(session.x11vnc_process, "x11vnc")
-        self._kill_process_safely(session.fluxbox_process, "fluxbox")
-        self._kill_process_safely(session.xvfb_process, "Xvfb")
+        processes = [
+            ("websockify", session.websockify_process),
+            ("x11vnc", session.x11vnc_process),
+            ("fluxbox", session.fluxbox_process),
+            ("Xvfb", session.xvfb_process),
+        ]
         
-        session.is_active = False
+        try:
+            # One killpg signals every process in the session, helpers they spawned included
+            if self._signal_group(session, signal.SIGTERM):
+                live = [(name, process) for name, process in processes if process and process.poll() is None]
+            else:
+                live = self._term_all(processes)
+            self._wait_all(live)
+            # Sweep grandchildren that outlived their parents
+            self._signal_group(session, signal.SIGKILL)
+            
+            self._stop_ws_proxy(session)
+        finally:
+            # The session is already untracked - a failed teardown must not leak its slot
+            session.is_active = False
+            self._release_slot(session.display_num)
+    
+    def _stop_ws_proxy(self, session: VNCSession) -> None:
+        """Shut down a session's in-process proxy on the loop that owns it, from any thread"""
+        runner, loop = session.ws_proxy, session.ws_proxy_loop
+        if runner is None or loop is None or loop.is_closed():
+            return
+        session.ws_proxy = None
+        
+        from .vnc_ws_proxy import stop_ws_proxy
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        
+        if running is loop:
+            task = loop.create_task(stop_ws_proxy(runner))
+            self._bg_tasks.add(task)
+            task.add_done_callback(self._bg_tasks.discard)
+        else:
+            asyncio.run_coroutine_threadsafe(stop_ws_proxy(runner), loop)
     
     def destroy_session(self, session_id: str) -> bool:
         """Destroy a VNC session"""
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            logger.warning(f"⚠️ Session {session_id} not found")
+            return False
+        
+        user_sessions = self._by_user.get(session.user_id)
+        if user_sessions is not None:
+            user_sessions.pop(session_id, None)
+            if not user_sessions:
+                del self._by_user[session.user_id]
+        
         try:
-            if session_id not in self.sessions:
-                logger.warning(f"⚠️ Session {session_id} not found")
-                return False
-            
-            session = self.sessions[session_id]
-            self._cleanup_session(session)
-            del self.sessions[session_id]
-            
-            logger.info(f"✅ VNC session {session_id} destroyed successfully")
-            return True
-            
-        except Exception as e:
+            parked = self._return_to_pool(session)
+        except (OSError, subprocess.SubprocessError) as e:
+            # Half-parked display - tear the rest down so its slot comes back
+            logger.warning(f"⚠️ Could not return display :{session.display_num} to warm pool: {e}")
+            parked = False
+        
+        try:
+            if not parked:
+                self._cleanup_session(session)
+        except (OSError, subprocess.SubprocessError) as e:
             logger.error(f"❌ Error destroying VNC session {session_id}: {e}")
             return False
+        
+        logger.info(f"✅ VNC session {session_id} destroyed successfully")
+        return True
     
     def get_session(self, session_id: str) -> Optional[VNCSession]:
         """Get a VNC session by ID"""
@@ -238,7 +739,7 @@ class VNCManager:
     
     def get_user_sessions(self, user_id: str) -> List[VNCSession]:
         """Get all VNC sessions for a user"""
-        return [session for session in self.sessions.values() if session.user_id == user_id]
+        return [self.sessions[session_id] for session_id in self._by_user.get(user_id, ())]
     
     def list_sessions(self) -> List[VNCSession]:
         """List all active VNC sessions"""
@@ -261,12 +762,38 @@ class VNCManager:
     def cleanup_all_sessions(self) -> None:
         """Clean up all VNC sessions"""
         logger.info("🧹 Cleaning up all VNC sessions")
+        # Stop the warm pool first so nothing is parked or booted behind our back
+        with self._warm_lock:
+            self._pool_closed = True
+        if self._refill_thread is not None and self._refill_thread is not threading.current_thread():
+            self._refill_thread.join(timeout=VNC_READY_TIMEOUT)
+        
         session_ids = list(self.sessions.keys())
         for session_id in session_ids:
             self.destroy_session(session_id)
+        
+        # Idle displays go too
+        while True:
+            with self._warm_lock:
+                if not self._warm:
+                    break
+                session = self._warm.popleft()
+            self._cleanup_session(session)
+    
+    def _sigchld_active(self) -> bool:
+        """True while our SIGCHLD handler is installed and nothing has replaced it since"""
+        return self._sigchld_installed and signal.getsignal(signal.SIGCHLD) == self._on_sigchld
     
     def health_check(self) -> Dict[str, bool]:
         """Check health of all VNC sessions"""
+        if self._sigchld_active():
+            # The handler already flipped is_active for any session that lost a process
+            while self._died:
+                name, session_id = self._died.popleft()
+                logger.warning(f"⚠️ {name} process died for session {session_id}")
+            return {session_id: session.is_active for session_id, session in self.sessions.items()}
+        
+        # Handler missing or replaced (libuv, another library) - is_active may be stale
         health_status = {}
         
         for session_id, session in self.sessions.items():
@@ -279,7 +806,12 @@ class VNCManager:
                 ("x11vnc", session.x11vnc_process),
                 ("websockify", session.websockify_process)
             ]
+            if session.ws_proxy is not None:
+                # Proxied in-process - there is no websockify process to check
+                processes.pop()
             
+            # poll() is a single waitpid(WNOHANG) and reaps; os.kill(pid, 0) would
+            # still succeed on an unreaped (zombie) child and report it alive
             for name, process in processes:
                 if not process or process.poll() is not None:
                     logger.warning(f"⚠️ {name} process died for session {session_id}")
@@ -295,26 +827,67 @@ class VNCManager:
     
     def __del__(self):
         """Cleanup on destruction"""
+        # Nothing to do for a manager that never got going (or was already cleaned up)
+        if not getattr(self, 'sessions', None) and not getattr(self, '_warm', None):
+            return
         try:
             self.cleanup_all_sessions()
         except Exception:
+            # Interpreter shutdown can take logging/subprocess down first
             pass
 
-# Global VNC manager instance
-vnc_manager = VNCManager()
+def _chain(prev, handler):
+    """Run handler, then whatever was installed for the signal before us"""
+    def chained(signum, frame):
+        handler(signum, frame)
+        if callable(prev):
+            prev(signum, frame)
+        else:
+            # SIG_DFL/SIG_IGN or a handler installed outside Python - keep the old exit
+            sys.exit(0)
+    return chained
+
 
 def signal_handler(signum, frame):
     """Handle shutdown signals"""
     logger.info("🛑 Received shutdown signal, cleaning up VNC sessions...")
-    vnc_manager.cleanup_all_sessions()
-    sys.exit(0)
+    get_vnc_manager().cleanup_all_sessions()
+
+
+def _install_shutdown_handlers(manager: VNCManager) -> None:
+    """Clean up on interpreter exit and on SIGINT/SIGTERM, keeping the host's own handlers"""
+    atexit.register(manager.cleanup_all_sessions)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            signal.signal(signum, _chain(signal.getsignal(signum), signal_handler))
+        except ValueError:
+            # Not the main thread - atexit still covers a normal shutdown
+            logger.debug(f"Shutdown handler for {signal.Signals(signum).name} not installed")
+
+
+@functools.lru_cache(maxsize=1)
+def get_vnc_manager() -> VNCManager:
+    """
+    The process-wide VNC manager, created on first use. Importing this module no
+    longer touches the disk or signal handlers, so it is cheap to import for
+    VNCSession alone and fine on hosts without noVNC.
+    """
+    manager = VNCManager()
+    _install_shutdown_handlers(manager)
+    # Boot the warm pool now so the first session doesn't cold-start (no-op at size 0)
+    manager.warm_up()
+    return manager
+
 
-# Register signal handlers
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
+def __getattr__(name: str) -> Any:
+    # `from utils.vnc_manager import vnc_manager` keeps working, just lazily
+    if name == 'vnc_manager':
+        return get_vnc_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
     # Test the VNC manager
+    vnc_manager = get_vnc_manager()
     logger.info("🧪 Testing VNC Manager")
     
     # Create a test session
@@ -323,13 +896,23 @@ if __name__ == "__main__":
         logger.info(f"✅ Test session created: {session.session_id}")
         logger.info(f"🌐 Access via: {vnc_manager.get_novnc_url(session.session_id)}")
         
-        # Keep running for testing
+        # Keep running for testing - sleep until a signal arrives (SIGCHLD updates
+        # session health as children die) and only report when health changes.
+        # Without our SIGCHLD handler a child exit is ignored and would never wake
+        # pause(), so fall back to checking every 10 seconds
         try:
             logger.info("🔄 VNC Manager running... Press Ctrl+C to stop")
+            last_health = vnc_manager.health_check()
+            logger.info(f"💓 Health check: {last_health}")
             while True:
-                time.sleep(10)
+                if vnc_manager._sigchld_active():
+                    signal.pause()
+                else:
+                    time.sleep(10)
                 health = vnc_manager.health_check()
-                logger.info(f"💓 Health check: {health}")
+                if health != last_health:
+                    logger.info(f"💓 Health check: {health}")
+                    last_health = health
         except KeyboardInterrupt:
             logger.info("🛑 Shutting down...")
             vnc_manager.cleanup_all_sessions()
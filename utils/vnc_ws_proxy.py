@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+In-process noVNC WebSocket Proxy
+Serves noVNC's static files and bridges its WebSocket to a session's x11vnc port,
+standing in for a websockify subprocess per session
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from aiohttp import web, WSMsgType
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from x11vnc per WebSocket frame. Large reads keep the syscall count per
+# screen update low; the pumps stay on the regular asyncio loop (no io_uring backend)
+# because aiohttp owns the WebSocket side and every payload needs WebSocket framing
+VNC_PROXY_CHUNK = 64 * 1024
+# noVNC connects to this path unless told otherwise, same as websockify
+WEBSOCKIFY_PATH = '/websockify'
+
+
+async def _pump_vnc_to_ws(reader: asyncio.StreamReader, ws: web.WebSocketResponse) -> None:
+    """x11vnc -> browser"""
+    while True:
+        data = await reader.read(VNC_PROXY_CHUNK)
+        if not data:
+            break
+        await ws.send_bytes(data)
+
+
+async def _pump_ws_to_vnc(ws: web.WebSocketResponse, writer: asyncio.StreamWriter) -> None:
+    """browser -> x11vnc"""
+    async for msg in ws:
+        if msg.type == WSMsgType.BINARY:
+            writer.write(msg.data)
+            await writer.drain()
+        elif msg.type == WSMsgType.ERROR:
+            break
+
+
+def _make_handler(vnc_port: int):
+    """WebSocket handler bridging one noVNC client to localhost:vnc_port"""
+    async def handle(request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(protocols=('binary',), max_msg_size=0)
+        await ws.prepare(request)
+
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', vnc_port)
+        except OSError as e:
+            logger.warning(f"⚠️ VNC proxy could not reach port {vnc_port}: {e}")
+            await ws.close()
+            return ws
+
+        pumps = [
+            asyncio.create_task(_pump_vnc_to_ws(reader, ws)),
+            asyncio.create_task(_pump_ws_to_vnc(ws, writer)),
+        ]
+        try:
+            # Either side hanging up ends the bridge
+            await asyncio.wait(pumps, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for pump in pumps:
+                pump.cancel()
+            await asyncio.gather(*pumps, return_exceptions=True)
+            writer.close()
+            await ws.close()
+        return ws
+
+    return handle
+
+
+async def start_ws_proxy(novnc_path: str, listen_port: int, vnc_port: int,
+                         host: Optional[str] = None) -> web.AppRunner:
+    """
+    Serve noVNC on listen_port with its WebSocket bridged to x11vnc on vnc_port.
+    Returns the runner; pass it to stop_ws_proxy to shut the proxy down.
+    """
+    app = web.Application()
+    app.router.add_get(WEBSOCKIFY_PATH, _make_handler(vnc_port))
+    app.router.add_static('/', novnc_path)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host=host, port=listen_port).start()
+    except Exception:
+        await runner.cleanup()
+        raise
+    return runner
+
+
+async def stop_ws_proxy(runner: web.AppRunner) -> None:
+    """Close the proxy's listener and any open bridges"""
+    try:
+        await runner.cleanup()
+    except Exception as e:
+        logger.warning(f"⚠️ Error stopping VNC proxy: {e}")